@@ -1,17 +1,189 @@
 import os
+import re
 from functools import lru_cache
 
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
 import psycopg2
+from psycopg2.pool import ThreadedConnectionPool
 import pandas as pd
 import numpy as np
+
+# python-calamine is optional: without it pandas falls back to openpyxl
+try:
+    import python_calamine  # noqa: F401
+    CALAMINE_AVAILABLE = True
+except ImportError:
+    CALAMINE_AVAILABLE = False
 # Import from helpers module
 from utils.helpers import format_ad_revenue
 from handle_segments import get_wbd_segments, get_paramount_segments
 
-@lru_cache(maxsize=8)
+# pyarrow is optional: without it the processed-data Parquet cache is skipped
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Processed sheets are cached as Parquet, keyed by the workbook's mtime and size;
+# set EARNINGSCALL_NO_DATA_CACHE=1 to always re-parse the Excel file
+_DATA_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+_DATA_CACHE_VERSION = 3
+_CACHED_FRAMES = ('df_metrics', 'df_employees', 'df_segments')
+
+# Connection pools for the database fallbacks, one per set of connect arguments
+_PG_POOL_MAXCONN = 8
+_PG_POOLS = {}
+_PG_POOLS_LOCK = threading.Lock()
+
+@contextmanager
+def _pg_connection(*args, **kwargs):
+    """Borrow a pooled connection instead of opening a new one per lookup."""
+    key = (args, tuple(sorted(kwargs.items())))
+    with _PG_POOLS_LOCK:
+        entry = _PG_POOLS.get(key)
+        if entry is None:
+            entry = _PG_POOLS[key] = (
+                ThreadedConnectionPool(1, _PG_POOL_MAXCONN, *args, **kwargs),
+                threading.BoundedSemaphore(_PG_POOL_MAXCONN),
+            )
+    pool, slots = entry
+    # getconn() raises PoolError when every connection is out, so wait for a slot first
+    with slots:
+        conn = pool.getconn()
+        try:
+            yield conn
+        finally:
+            # Don't hand back a connection left idle in a transaction; drop it if it broke
+            if not conn.closed:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    pass
+            pool.putconn(conn, close=bool(conn.closed))
+
+# Entries per (company, year) lookup cache on each processor
+_LOOKUP_CACHE_SIZE = 4096
+
+class _FallbackFailed(Exception):
+    """A database fallback failed; raised through the cached lookups so lru_cache does not memoize the miss."""
+
+# Currency symbols, thousands separators and stringified NaNs stripped before numeric parsing
+_NUMBER_JUNK_RE = re.compile(r'[$,]|nan')
+
+# Segment pie colors, cycled when a company has more segments than colors
+_SEGMENT_PALETTE = ("#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd")
+
+# usecols already parsed per (path, mtime, sheet), so narrower reads can slice them
+_PARSED_USECOLS = {}
+
+def _excel_file(path):
+    """Open the workbook once per modification time so every sheet read shares a single unzip and parse."""
+    return _open_excel_file(path, os.stat(path).st_mtime_ns)
+
+@lru_cache(maxsize=2)
+def _open_excel_file(path, mtime_ns):
+    return pd.ExcelFile(path, engine="calamine" if CALAMINE_AVAILABLE else None)
+
 def _read_excel_sheet(path, sheet_name, usecols):
-    """Cache Excel sheet reads to avoid repeated disk IO."""
-    return pd.read_excel(path, sheet_name=sheet_name, usecols=list(usecols) if usecols else None)
+    """
+    Cache Excel sheet reads to avoid repeated disk IO.
+
+    Reads are keyed on the file's mtime, so an edited workbook is re-parsed, and on
+    the sorted usecols, so the same columns in any order share one parse. A read whose
+    columns are a subset of an earlier read of the same sheet slices that frame.
+    """
+    mtime_ns = os.stat(path).st_mtime_ns
+    usecols = tuple(sorted(usecols)) if usecols else None
+    sheet_key = (path, mtime_ns, sheet_name)
+    if usecols is not None:
+        wanted = set(usecols)
+        for parsed in _PARSED_USECOLS.get(sheet_key, ()):
+            if parsed == usecols or (parsed is not None and not wanted.issubset(parsed)):
+                continue
+            df = _cached_excel_sheet(path, mtime_ns, sheet_name, parsed)
+            if wanted.issubset(df.columns):
+                # Keep the sheet's column order, as a usecols parse would
+                return df[[c for c in df.columns if c in wanted]]
+    df = _cached_excel_sheet(path, mtime_ns, sheet_name, usecols)
+    _PARSED_USECOLS.setdefault(sheet_key, set()).add(usecols)
+    return df
+
+@lru_cache(maxsize=8)
+def _cached_excel_sheet(path, mtime_ns, sheet_name, usecols):
+    return _open_excel_file(path, mtime_ns).parse(sheet_name=sheet_name, usecols=list(usecols) if usecols else None)
+
+
+# Static cash balance data in millions (hard-coded for performance), built once at import
+_CASH_BALANCE_DATA = {
+    'Apple': {
+        2010: 25620, 2011: 25950, 2012: 29130, 2013: 40550, 2014: 25080,
+        2015: 41600, 2016: 67160, 2017: 74180, 2018: 66300, 2019: 100560,
+        2020: 90940, 2021: 62640, 2022: 48300, 2023: 61560, 2024: 65170
+    },
+    'Warner Bros. Discovery': {
+        # Warner Bros. Discovery cash balance values in millions
+        2010: 0.0, 2011: 0.0, 2012: 0.0, 2013: 0.0, 2014: 0.0,
+        2015: 0.0, 2016: 0.0, 2017: 0.0, 2018: 0.0, 2019: 0.0,
+        2020: 2091, 2021: 3905, 2022: 3731, 2023: 3780, 2024: 5312
+    },
+    'Paramount Global': {
+        # Paramount Global cash balance values in millions
+        2010: 0.0, 2011: 0.0, 2012: 0.0, 2013: 0.0, 2014: 0.0,
+        2015: 0.0, 2016: 0.0, 2017: 0.0, 2018: 0.0, 2019: 0.0,
+        2020: 2984, 2021: 6267, 2022: 2885, 2023: 2460, 2024: 2661
+    },
+    'Alphabet': {
+        2010: 33370, 2011: 44620, 2012: 47150, 2013: 57440, 2014: 62630,
+        2015: 73060, 2016: 86330, 2017: 101870, 2018: 109140, 2019: 119670,
+        2020: 136690, 2021: 139640, 2022: 113760, 2023: 110910, 2024: 95650
+    },
+    'Meta Platforms': {
+        2010: 1780, 2011: 3900, 2012: 9620, 2013: 11440, 2014: 11190,
+        2015: 18430, 2016: 29440, 2017: 41710, 2018: 41110, 2019: 54850,
+        2020: 61950, 2021: 47990, 2022: 40730, 2023: 65400, 2024: 77810
+    },
+    'Microsoft': {
+        2010: 36790, 2011: 52770, 2012: 63040, 2013: 77020, 2014: 85710,
+        2015: 96530, 2016: 113240, 2017: 132980, 2018: 133770, 2019: 133820,
+        2020: 136530, 2021: 130330, 2022: 104760, 2023: 111260, 2024: 75540
+    },
+    'Amazon': {
+        2010: 8760, 2011: 9580, 2012: 11450, 2013: 12450, 2014: 17420,
+        2015: 19810, 2016: 25980, 2017: 30990, 2018: 41250, 2019: 55020,
+        2020: 84400, 2021: 96050, 2022: 70030, 2023: 86780, 2024: 101200
+    },
+    'Netflix': {
+        2010: 350, 2011: 800, 2012: 750, 2013: 1200, 2014: 1610,
+        2015: 2310, 2016: 1730, 2017: 2820, 2018: 3790, 2019: 5020,
+        2020: 8210, 2021: 6030, 2022: 6060, 2023: 7140, 2024: 9580
+    },
+    'Spotify': {
+        2018: 2133, 2019: 1968, 2020: 1996, 2021: 4141,
+        2022: 3530, 2023: 4561, 2024: 8059
+    },
+    'Comcast': {
+        2010: 5980, 2011: 1620, 2012: 10950, 2013: 1720, 2014: 3910,
+        2015: 2300, 2016: 3300, 2017: 3430, 2018: 3810, 2019: 5500,
+        2020: 11740, 2021: 8710, 2022: 4750, 2023: 6220, 2024: 7320
+    },
+    'Disney': {
+        2010: 2722, 2011: 3185, 2012: 3387, 2013: 3931, 2014: 3421,
+        2015: 4269, 2016: 4610, 2017: 4017, 2018: 4150, 2019: 5418,
+        2020: 17914, 2021: 15959, 2022: 11615, 2023: 14182, 2024: 6002
+    },
+    'Roku': {
+        2015: 76, 2016: 35, 2017: 177, 2018: 198, 2019: 517,
+        2020: 1093, 2021: 2146, 2022: 1962, 2023: 2026, 2024: 2160
+    },
+    'RTL': 'Coming Soon',
+    'TF1': 'Coming Soon',
+    'ProSieben': 'Coming Soon',
+    'ITV': 'Coming Soon'
+}
 
 
 class FinancialDataProcessor:
@@ -30,17 +202,34 @@ class FinancialDataProcessor:
         self.df_revenue_by_region = None
         self.df_subscribers = None
         self.df_nasdaq_market_cap = None
+        self.nasdaq_yearly = None
         self.data_path = None
         self.metrics_index = None
-        self.employees_index = None
-        self.market_cap_data = {}
+        self.segment_totals = None
+        self.ad_revenue_index = None
+        self.employees_map = None
+        self.market_cap_map = None
         self.logger = None
+        # Bounded per-instance lookup caches, so instances never share results
+        self.get_market_cap = lru_cache(maxsize=_LOOKUP_CACHE_SIZE)(self._get_market_cap_impl)
+        self.get_cash_balance = lru_cache(maxsize=_LOOKUP_CACHE_SIZE)(self._get_cash_balance_impl)
+        self._cached_employee_count = lru_cache(maxsize=_LOOKUP_CACHE_SIZE)(self._get_employee_count_impl)
+        self.get_nasdaq_market_cap = lru_cache(maxsize=256)(self._get_nasdaq_market_cap_impl)
+        self._cached_advertising_revenue = lru_cache(maxsize=_LOOKUP_CACHE_SIZE)(self._get_advertising_revenue_impl)
+        self._frame_segments = lru_cache(maxsize=_LOOKUP_CACHE_SIZE)(self._frame_segments_impl)
+        # Resolved once; reloads reuse the path instead of probing the candidates again
+        self._resolved_excel_path = None
+        self._resolved_excel_path = self._resolve_excel_path()
 
     def is_db_empty(self):
         return (self.df_metrics is None or self.df_metrics.empty) and (self.df_segments is None or self.df_segments.empty)
 
     def load_data(self):
         """Load data from the primary Excel source."""
+        # Lookups cached against previously loaded frames would be stale
+        self.clear_cache()
+        self.segment_totals = None
+        self.ad_revenue_index = None
         excel_path = self._resolve_excel_path()
         if not excel_path:
             print("Excel data file not found. Metrics/segments will be empty.")
@@ -53,6 +242,15 @@ class FinancialDataProcessor:
             return
 
         self.data_path = excel_path
+        # Lazily loaded sheets start empty on both the cached and the Excel path
+        self.df_ad_revenue = None
+        self.df_revenue_by_region = None
+        self.df_subscribers = None
+        self.df_nasdaq_market_cap = None
+
+        cache_paths = self._data_cache_paths(excel_path)
+        if self._load_cached_frames(cache_paths):
+            return
 
         try:
             metrics_cols = (
@@ -72,14 +270,11 @@ class FinancialDataProcessor:
             employees_cols = ("Company", "Year", "Employee Count")
             segments_cols = ("Company", "year", "segments", "Yearly Segment Revenue")
 
-            self.df_metrics = _read_excel_sheet(excel_path, "Company_metrics_earnings_values", metrics_cols).copy()
-            self.df_employees = _read_excel_sheet(excel_path, "Company_Employees", employees_cols).copy()
-            self.df_segments = _read_excel_sheet(excel_path, "Company_yearly_segments_values", segments_cols).copy()
-            # Load these lazily when needed
-            self.df_ad_revenue = None
-            self.df_revenue_by_region = None
-            self.df_subscribers = None
-            self.df_nasdaq_market_cap = None
+            # Shallow copies: processing renames headers and replaces whole columns,
+            # which never writes into the cached frames' data
+            self.df_metrics = _read_excel_sheet(excel_path, "Company_metrics_earnings_values", metrics_cols).copy(deep=False)
+            self.df_employees = _read_excel_sheet(excel_path, "Company_Employees", employees_cols).copy(deep=False)
+            self.df_segments = _read_excel_sheet(excel_path, "Company_yearly_segments_values", segments_cols).copy(deep=False)
         except Exception as e:
             print(f"Error loading Excel data: {e}")
             self.df_metrics = pd.DataFrame(columns=['company', 'year'])
@@ -92,10 +287,62 @@ class FinancialDataProcessor:
             return
 
         self.process_data()
+        self._save_cached_frames(cache_paths)
         return
 
+    def _data_cache_paths(self, excel_path):
+        """Parquet cache file per processed sheet for this version of the workbook, or None if disabled."""
+        if not PYARROW_AVAILABLE or os.getenv('EARNINGSCALL_NO_DATA_CACHE') == '1':
+            return None
+        try:
+            stat = os.stat(excel_path)
+        except OSError:
+            return None
+        key = f"v{_DATA_CACHE_VERSION}_{stat.st_mtime_ns}_{stat.st_size}"
+        return {name: os.path.join(_DATA_CACHE_DIR, f"{name}_{key}.parquet") for name in _CACHED_FRAMES}
+
+    def _load_cached_frames(self, cache_paths):
+        """Restore the processed sheets from the Parquet cache; False on a miss."""
+        if not cache_paths or not all(os.path.exists(path) for path in cache_paths.values()):
+            return False
+        try:
+            frames = {name: pd.read_parquet(path) for name, path in cache_paths.items()}
+        except Exception as e:
+            print(f"Error reading cached data, re-parsing Excel: {e}")
+            return False
+        for name, df in frames.items():
+            setattr(self, name, df)
+        # Lookup indexes built by process_data
+        if not self.df_metrics.empty:
+            self.metrics_index = self.df_metrics.set_index(['company', 'year'])
+        if not self.df_employees.empty:
+            self._index_employees()
+        if not self.df_segments.empty:
+            self._total_segments()
+        return True
+
+    def _save_cached_frames(self, cache_paths):
+        """Write the processed sheets to the Parquet cache, replacing older versions."""
+        if not cache_paths:
+            return
+        try:
+            os.makedirs(_DATA_CACHE_DIR, exist_ok=True)
+            for name, path in cache_paths.items():
+                tmp_path = f"{path}.tmp"
+                getattr(self, name).to_parquet(tmp_path, compression='zstd')
+                os.replace(tmp_path, path)
+            current = {os.path.basename(path) for path in cache_paths.values()}
+            for filename in os.listdir(_DATA_CACHE_DIR):
+                if filename.startswith(_CACHED_FRAMES) and filename not in current:
+                    os.remove(os.path.join(_DATA_CACHE_DIR, filename))
+        except Exception as e:
+            print(f"Error caching processed data: {e}")
+
     def _resolve_excel_path(self):
         """Locate the primary Excel data file."""
+        if self._resolved_excel_path:
+            return self._resolved_excel_path
+
         env_path = os.getenv('FINANCIAL_DATA_XLSX')
         if env_path and os.path.exists(env_path):
             return env_path
@@ -112,22 +359,43 @@ class FinancialDataProcessor:
         return None
 
     def _to_number(self, series):
+        # Columns Excel already typed as numbers skip the string round-trip
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            return pd.to_numeric(series, errors='coerce')
         return pd.to_numeric(
             series.astype(str)
-            .str.replace('$', '')
-            .str.replace(',', '')
+            .str.replace(_NUMBER_JUNK_RE, '', regex=True)
             .str.replace(' -   ', '0')
-            .str.replace('nan', '')
             .str.strip(),
             errors='coerce'
         )
 
-    def _compute_yoy_series(self, series):
-        values = series.tolist()
-        yoy = [None]
-        for idx in range(1, len(values)):
-            yoy.append(self.calculate_yoy_change(values[idx], values[idx - 1]))
-        return pd.Series(yoy, index=series.index)
+    def _to_number_scalar(self, value):
+        """_to_number for a single cell, without building a one-element Series."""
+        if isinstance(value, (int, float, np.number)) and not isinstance(value, (bool, np.bool_)):
+            return value
+        text = _NUMBER_JUNK_RE.sub('', str(value)).replace(' -   ', '0').strip()
+        for parse in (int, float):
+            try:
+                return parse(text)
+            except ValueError:
+                pass
+        return np.nan
+
+    def _compute_yoy(self, current, previous):
+        """Vectorized calculate_yoy_change over aligned current/previous values."""
+        current = current.to_numpy(dtype=float)
+        previous = previous.to_numpy(dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            change = ((current - previous) / previous) * 100
+            # Loss to profit: always an improvement
+            recovery = abs(((current - previous) / abs(previous)) * 100)
+        result = np.round(change, 1)
+        result = np.where((previous < 0) & (current > 0), recovery, result)
+        # Negative to more negative: always a decline
+        result = np.where((current < 0) & (previous < 0) & (current < previous), -abs(change), result)
+        result[np.isnan(current) | np.isnan(previous) | (previous == 0)] = np.nan
+        return result
 
     def _load_ad_revenue(self):
         """Lazy-load advertising revenue data."""
@@ -143,7 +411,7 @@ class FinancialDataProcessor:
                 self.data_path,
                 "Company_advertising_revenue",
                 None,
-            ).copy()
+            ).copy(deep=False)
             self._normalize_ad_revenue_columns()
         except Exception as exc:
             logger = getattr(self, "logger", None)
@@ -153,6 +421,7 @@ class FinancialDataProcessor:
 
     def _normalize_ad_revenue_columns(self):
         """Ensure ad revenue sheet has a normalized 'year' column (handles trailing spaces/case)."""
+        self.ad_revenue_index = None
         if self.df_ad_revenue is None or self.df_ad_revenue.empty:
             return
 
@@ -169,9 +438,11 @@ class FinancialDataProcessor:
 
         if 'year' in self.df_ad_revenue.columns:
             try:
-                self.df_ad_revenue['year'] = self._to_number(self.df_ad_revenue['year']).fillna(0).astype(int)
+                self.df_ad_revenue['year'] = self._to_int_year(self.df_ad_revenue['year'])
             except Exception:
                 pass
+            # First row per year, as the old boolean-mask lookup returned
+            self.ad_revenue_index = self.df_ad_revenue.drop_duplicates('year').set_index('year')
 
     def load_market_cap_data(self):
         """
@@ -181,7 +452,8 @@ class FinancialDataProcessor:
           - No hard-coded market cap series: always sourced from the Excel file.
           - Values are stored in the same units as the source sheet (typically millions USD).
         """
-        self.market_cap_data = {}
+        self.market_cap_map = None
+        self.get_market_cap.cache_clear()
 
         # Prefer already-loaded, normalized metrics (fast path).
         df = self.df_metrics
@@ -195,9 +467,10 @@ class FinancialDataProcessor:
                     self.data_path,
                     "Company_metrics_earnings_values",
                     ("Company", "Year", "Market Cap."),
-                ).copy()
+                )
+                # rename returns a new frame, so the cached sheet is never written to
                 df = df.rename(columns={"Company": "company", "Year": "year", "Market Cap.": "market_cap"})
-                df["year"] = self._to_number(df["year"]).astype("Int64")
+                df["year"] = self._to_number(df["year"])
                 df["market_cap"] = self._to_number(df["market_cap"])
             except Exception:
                 return
@@ -206,13 +479,20 @@ class FinancialDataProcessor:
         if not required.issubset(set(df.columns)):
             return
 
-        sub = df[["company", "year", "market_cap"]].dropna(subset=["company", "year", "market_cap"]).copy()
-        sub["year"] = pd.to_numeric(sub["year"], errors="coerce").astype("Int64")
-        sub["market_cap"] = pd.to_numeric(sub["market_cap"], errors="coerce")
-        sub = sub.dropna(subset=["year", "market_cap"])
+        sub = df[["company", "year", "market_cap"]]
+        # Processed metrics are already numeric; only coerce columns that are not
+        coerced = {
+            col: pd.to_numeric(sub[col], errors="coerce")
+            for col in ("year", "market_cap")
+            if not pd.api.types.is_numeric_dtype(sub[col])
+        }
+        if coerced:
+            sub = sub.assign(**coerced)
+        sub = sub.dropna(subset=["company", "year", "market_cap"])
 
-        for company, grp in sub.groupby("company", dropna=True):
-            self.market_cap_data[str(company)] = {int(y): float(v) for y, v in zip(grp["year"], grp["market_cap"])}
+        # Flat (company, year) -> market cap dict; later rows win on duplicates
+        keys = zip(sub["company"].tolist(), sub["year"].astype("int64").tolist())
+        self.market_cap_map = dict(zip(keys, sub["market_cap"].astype("float64").tolist()))
 
     def parse_market_cap_value(self, value_str):
         try:
@@ -227,27 +507,50 @@ class FinancialDataProcessor:
         except (ValueError, AttributeError):
             return None
 
-    # Cache for market cap data
-    _market_cap_cache = {}
-    
-    def get_market_cap(self, company, year):
-        """Get market cap for a specific company and year with caching"""
-        # Check if result is already in cache
-        cache_key = f"{company}_{year}"
-        if cache_key in self._market_cap_cache:
-            return self._market_cap_cache[cache_key]
-            
+    def _get_market_cap_impl(self, company, year):
+        """Get market cap for a specific company and year (cached per instance as get_market_cap)"""
         try:
-            result = self.market_cap_data.get(company, {}).get(int(year))
-            # Cache the result
-            self._market_cap_cache[cache_key] = result
-            return result
-        except:
+            year = int(year)
+        except (TypeError, ValueError):
+            return None
+        if self.market_cap_map is None:
             return None
+        return self.market_cap_map.get((company, year))
+
+    def _normalize_columns(self, df, rename_map):
+        """Strip header whitespace and apply only the renames that match, skipping rename when none do."""
+        df.columns = [str(c).strip() for c in df.columns]
+        needed = {old: new for old, new in rename_map.items() if old != new and old in df.columns}
+        return df.rename(columns=needed) if needed else df
+
+    def _to_int_year(self, series):
+        """Parse a year column to int32, with unparseable years as 0."""
+        return self._to_number(series).fillna(0).astype('int32')
+
+    def _to_number_columns(self, df, columns=()):
+        """Parse 'year' and the given columns in place, skipping any the sheet lacks."""
+        present = df.columns
+        if 'year' in present:
+            df['year'] = self._to_int_year(df['year'])
+        for col in columns:
+            if col in present:
+                df[col] = self._to_number(df[col])
+        return df
+
+    def _drop_mfe(self, df):
+        """Encode company as a categorical and drop the MFE rows, without leaving MFE as an unused category."""
+        if 'company' not in df.columns:
+            return df
+        company = df['company'].astype('category')
+        keep = (company != 'MFE').to_numpy()
+        return df[keep].assign(company=company[keep].cat.remove_unused_categories())
 
     def process_data(self):
+        numeric_columns = [
+            'operating_income', 'debt', 'revenue', 'net_income', 'cost_of_revenue',
+            'rd', 'capex', 'total_assets', 'market_cap', 'cash_balance'
+        ]
         if self.df_metrics is not None and not self.df_metrics.empty:
-            self.df_metrics.columns = [str(c).strip() for c in self.df_metrics.columns]
             rename_map = {
                 'Company': 'company',
                 'Year': 'year',
@@ -262,68 +565,74 @@ class FinancialDataProcessor:
                 'Market Cap.': 'market_cap',
                 'Cash Balance': 'cash_balance',
             }
-            self.df_metrics = self.df_metrics.rename(columns=rename_map)
-            if 'year' in self.df_metrics.columns:
-                self.df_metrics['year'] = self._to_number(self.df_metrics['year']).fillna(0).astype(int)
-            if 'company' in self.df_metrics.columns:
-                self.df_metrics = self.df_metrics[self.df_metrics['company'] != 'MFE']
-
-            numeric_columns = [
-                'operating_income', 'debt', 'revenue', 'net_income', 'cost_of_revenue',
-                'rd', 'capex', 'total_assets', 'market_cap', 'cash_balance'
-            ]
-            for col in numeric_columns:
-                if col in self.df_metrics.columns:
-                    self.df_metrics[col] = self._to_number(self.df_metrics[col])
-
-            self.df_metrics = self.df_metrics.sort_values(['company', 'year'])
+            # MFE rows are dropped before parsing so they are never converted
+            self.df_metrics = (
+                self.df_metrics
+                .pipe(self._normalize_columns, rename_map)
+                .pipe(self._drop_mfe)
+                .pipe(self._to_number_columns, numeric_columns)
+                .sort_values(['company', 'year'])
+            )
+            # Previous year's values for every metric in one grouped shift
+            previous = self.df_metrics.groupby('company', observed=True)[numeric_columns].shift(1)
             for col in numeric_columns:
-                yoy_col = f"{col}_yoy"
-                self.df_metrics[yoy_col] = (
-                    self.df_metrics.groupby('company')[col]
-                    .transform(self._compute_yoy_series)
-                )
+                self.df_metrics[f"{col}_yoy"] = self._compute_yoy(self.df_metrics[col], previous[col])
 
             self.metrics_index = self.df_metrics.set_index(['company', 'year'])
 
         if self.df_segments is not None and not self.df_segments.empty:
-            self.df_segments.columns = [str(c).strip() for c in self.df_segments.columns]
             rename_map = {
                 'Company': 'company',
                 'year': 'year',
                 'segments': 'segment',
                 'Yearly Segment Revenue': 'revenue'
             }
-            self.df_segments = self.df_segments.rename(columns=rename_map)
-            if 'year' in self.df_segments.columns:
-                self.df_segments['year'] = self._to_number(self.df_segments['year']).fillna(0).astype(int)
-            if 'revenue' in self.df_segments.columns:
-                self.df_segments['revenue'] = self._to_number(self.df_segments['revenue'])
-            if 'company' in self.df_segments.columns:
-                self.df_segments = self.df_segments[self.df_segments['company'] != 'MFE']
+            self.df_segments = (
+                self.df_segments
+                .pipe(self._normalize_columns, rename_map)
+                .pipe(self._drop_mfe)
+                .pipe(self._to_number_columns, ['revenue'])
+            )
+            self._total_segments()
 
         if self.df_employees is not None and not self.df_employees.empty:
-            self.df_employees.columns = [str(c).strip() for c in self.df_employees.columns]
             rename_map = {
                 'Company': 'company',
                 'Year': 'year',
                 'Employee Count': 'employees'
             }
-            self.df_employees = self.df_employees.rename(columns=rename_map)
-            if 'year' in self.df_employees.columns:
-                self.df_employees['year'] = self._to_number(self.df_employees['year']).fillna(0).astype(int)
-            if 'employees' in self.df_employees.columns:
-                self.df_employees['employees'] = self._to_number(self.df_employees['employees'])
-            if 'company' in self.df_employees.columns:
-                self.df_employees = self.df_employees[self.df_employees['company'] != 'MFE']
-            self.employees_index = self.df_employees.set_index(['company', 'year'])
+            self.df_employees = (
+                self.df_employees
+                .pipe(self._normalize_columns, rename_map)
+                .pipe(self._drop_mfe)
+                .pipe(self._to_number_columns, ['employees'])
+            )
+            self._index_employees()
 
         if self.df_ad_revenue is not None and not self.df_ad_revenue.empty:
-            self.df_ad_revenue.columns = [str(c).strip() for c in self.df_ad_revenue.columns]
-            if 'Year' in self.df_ad_revenue.columns:
-                self.df_ad_revenue = self.df_ad_revenue.rename(columns={'Year': 'year'})
-            if 'year' in self.df_ad_revenue.columns:
-                self.df_ad_revenue['year'] = self._to_number(self.df_ad_revenue['year']).fillna(0).astype(int)
+            self.df_ad_revenue = (
+                self.df_ad_revenue
+                .pipe(self._normalize_columns, {'Year': 'year'})
+                .pipe(self._to_number_columns)
+            )
+            self.ad_revenue_index = None
+
+    def _total_segments(self):
+        """Sum revenue per (company, year, segment) once, for get_segments to slice."""
+        if not {'company', 'year', 'segment', 'revenue'}.issubset(self.df_segments.columns):
+            self.segment_totals = None
+            return
+        # dropna=False keeps rows with no segment name, so a company-year that only
+        # has those still resolves to an empty breakdown rather than the database
+        self.segment_totals = self.df_segments.groupby(
+            ['company', 'year', 'segment'], observed=True, dropna=False
+        )['revenue'].sum()
+
+    def _index_employees(self):
+        """Build the (company, year) -> employees dict over df_employees."""
+        # Plain dict for get_employee_count: no label resolution or boxing per lookup
+        employees = self.df_employees['employees'] if 'employees' in self.df_employees.columns else ()
+        self.employees_map = dict(zip(zip(self.df_employees['company'], self.df_employees['year']), employees))
 
     def format_large_number(self, value):
         """Format large numbers to billions/millions with proper rounding"""
@@ -347,12 +656,9 @@ class FinancialDataProcessor:
             return sorted(self.df_metrics['company'].dropna().unique().tolist())
 
         try:
-            conn = psycopg2.connect(os.environ.get('DATABASE_URL'))
-            cur = conn.cursor()
-            cur.execute("SELECT DISTINCT company FROM company_metrics WHERE company IS NOT NULL ORDER BY company")
-            companies = [row[0] for row in cur.fetchall()]
-            cur.close()
-            conn.close()
+            with _pg_connection(os.environ.get('DATABASE_URL')) as conn, conn.cursor() as cur:
+                cur.execute("SELECT DISTINCT company FROM company_metrics WHERE company IS NOT NULL ORDER BY company")
+                companies = [row[0] for row in cur.fetchall()]
             return companies if companies else []
         except Exception as e:
             print(f"Error fetching companies from database: {e}")
@@ -375,12 +681,9 @@ class FinancialDataProcessor:
             return sorted([int(y) for y in years], reverse=True)
 
         try:
-            conn = psycopg2.connect(os.environ.get('DATABASE_URL'))
-            cur = conn.cursor()
-            cur.execute("SELECT DISTINCT year FROM company_metrics WHERE company = %s AND year IS NOT NULL ORDER BY year DESC", (company,))
-            years = [row[0] for row in cur.fetchall()]
-            cur.close()
-            conn.close()
+            with _pg_connection(os.environ.get('DATABASE_URL')) as conn, conn.cursor() as cur:
+                cur.execute("SELECT DISTINCT year FROM company_metrics WHERE company = %s AND year IS NOT NULL ORDER BY year DESC", (company,))
+                years = [row[0] for row in cur.fetchall()]
             return years if years else [2024]
         except Exception as e:
             print(f"Error fetching years for {company}: {e}")
@@ -409,121 +712,29 @@ class FinancialDataProcessor:
         # This ensures consistent display with other percentage values
         return round(result, 1)
 
-    # Cache for cash balance data
-    _cash_balance_cache = {}
-    
-    def get_cash_balance(self, company, year):
-        """Get cash balance for a specific company and year with caching"""
-        # Check if result is already in cache
-        cache_key = f"{company}_{year}"
-        if cache_key in self._cash_balance_cache:
-            return self._cash_balance_cache[cache_key]
-            
+    def _get_cash_balance_impl(self, company, year):
+        """Get cash balance for a specific company and year (cached per instance as get_cash_balance)"""
         # Remove (Broadcaster) label if present
         company = company.replace(" (Broadcaster)", "")
 
-        # Static cash balance data (hard-coded for performance)
-        cash_balance_data = {
-            'Apple': {
-                2010: 25620, 2011: 25950, 2012: 29130, 2013: 40550, 2014: 25080,
-                2015: 41600, 2016: 67160, 2017: 74180, 2018: 66300, 2019: 100560,
-                2020: 90940, 2021: 62640, 2022: 48300, 2023: 61560, 2024: 65170
-            },
-            'Warner Bros. Discovery': {
-                # Warner Bros. Discovery cash balance values in millions
-                2010: 0.0, 2011: 0.0, 2012: 0.0, 2013: 0.0, 2014: 0.0,
-                2015: 0.0, 2016: 0.0, 2017: 0.0, 2018: 0.0, 2019: 0.0,
-                2020: 2091, 2021: 3905, 2022: 3731, 2023: 3780, 2024: 5312
-            },
-            'Paramount Global': {
-                # Paramount Global cash balance values in millions
-                2010: 0.0, 2011: 0.0, 2012: 0.0, 2013: 0.0, 2014: 0.0,
-                2015: 0.0, 2016: 0.0, 2017: 0.0, 2018: 0.0, 2019: 0.0,
-                2020: 2984, 2021: 6267, 2022: 2885, 2023: 2460, 2024: 2661
-            },
-            'Alphabet': {
-                2010: 33370, 2011: 44620, 2012: 47150, 2013: 57440, 2014: 62630,
-                2015: 73060, 2016: 86330, 2017: 101870, 2018: 109140, 2019: 119670,
-                2020: 136690, 2021: 139640, 2022: 113760, 2023: 110910, 2024: 95650
-            },
-            'Meta Platforms': {
-                2010: 1780, 2011: 3900, 2012: 9620, 2013: 11440, 2014: 11190,
-                2015: 18430, 2016: 29440, 2017: 41710, 2018: 41110, 2019: 54850,
-                2020: 61950, 2021: 47990, 2022: 40730, 2023: 65400, 2024: 77810
-            },
-            'Microsoft': {
-                2010: 36790, 2011: 52770, 2012: 63040, 2013: 77020, 2014: 85710,
-                2015: 96530, 2016: 113240, 2017: 132980, 2018: 133770, 2019: 133820,
-                2020: 136530, 2021: 130330, 2022: 104760, 2023: 111260, 2024: 75540
-            },
-            'Amazon': {
-                2010: 8760, 2011: 9580, 2012: 11450, 2013: 12450, 2014: 17420,
-                2015: 19810, 2016: 25980, 2017: 30990, 2018: 41250, 2019: 55020,
-                2020: 84400, 2021: 96050, 2022: 70030, 2023: 86780, 2024: 101200
-            },
-            'Netflix': {
-                2010: 350, 2011: 800, 2012: 750, 2013: 1200, 2014: 1610,
-                2015: 2310, 2016: 1730, 2017: 2820, 2018: 3790, 2019: 5020,
-                2020: 8210, 2021: 6030, 2022: 6060, 2023: 7140, 2024: 9580
-            },
-            'Spotify': {
-                2018: 2133, 2019: 1968, 2020: 1996, 2021: 4141,
-                2022: 3530, 2023: 4561, 2024: 8059
-            },
-            'Comcast': {
-                2010: 5980, 2011: 1620, 2012: 10950, 2013: 1720, 2014: 3910,
-                2015: 2300, 2016: 3300, 2017: 3430, 2018: 3810, 2019: 5500,
-                2020: 11740, 2021: 8710, 2022: 4750, 2023: 6220, 2024: 7320
-            },
-            'Disney': {
-                2010: 2722, 2011: 3185, 2012: 3387, 2013: 3931, 2014: 3421,
-                2015: 4269, 2016: 4610, 2017: 4017, 2018: 4150, 2019: 5418,
-                2020: 17914, 2021: 15959, 2022: 11615, 2023: 14182, 2024: 6002
-            },
-            'Roku': {
-                2015: 76, 2016: 35, 2017: 177, 2018: 198, 2019: 517,
-                2020: 1093, 2021: 2146, 2022: 1962, 2023: 2026, 2024: 2160
-            },
-            'RTL': 'Coming Soon',
-            'TF1': 'Coming Soon',
-            'ProSieben': 'Coming Soon',
-            'ITV': 'Coming Soon'
-        }
-
-        # Get the result and cache it
         result = None
-        if company in cash_balance_data:
-            if isinstance(cash_balance_data[company], str):
-                result = cash_balance_data[company]  # Return "Coming Soon" for broadcasters
-            else:
-                result = cash_balance_data[company].get(year)
-                
-        # Store in cache
-        self._cash_balance_cache[cache_key] = result
+        company_data = _CASH_BALANCE_DATA.get(company)
+        if isinstance(company_data, str):
+            result = company_data  # Return "Coming Soon" for broadcasters
+        elif company_data is not None:
+            result = company_data.get(year)
         return result
 
-    # Cache for employee count data
-    _employee_cache = {}
-    
-    def get_employee_count(self, company, year):
-        """Get employee count for a specific company and year with caching"""
-        # Check if result is already in cache
-        cache_key = f"{company}_{year}"
-        if cache_key in self._employee_cache:
-            return self._employee_cache[cache_key]
-
+    def _get_employee_count_impl(self, company, year):
+        """Get employee count for a specific company and year (cached per instance as _cached_employee_count)"""
         if self.df_employees is not None and not self.df_employees.empty:
             try:
                 year = int(float(year))
             except (TypeError, ValueError):
                 year = year
-            if self.employees_index is not None:
-                try:
-                    employee_count = self.employees_index.loc[(company, year), 'employees']
-                except KeyError:
-                    employee_count = None
+            if self.employees_map is not None:
+                employee_count = self.employees_map.get((company, year))
                 if employee_count is not None:
-                    self._employee_cache[cache_key] = employee_count
                     return employee_count
             else:
                 row = self.df_employees[
@@ -531,46 +742,39 @@ class FinancialDataProcessor:
                     (self.df_employees['year'] == year)
                 ]
                 if not row.empty:
-                    employee_count = row.iloc[0].get('employees')
-                    self._employee_cache[cache_key] = employee_count
-                    return employee_count
+                    return row.iloc[0].get('employees')
             
         try:
-            conn = psycopg2.connect(**self.db_params)
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT employee_count FROM employee_counts WHERE company = %s AND year = %s",
-                (company, year)
-            )
-            result = cursor.fetchone()
-            cursor.close()
-            conn.close()
+            with _pg_connection(**self.db_params) as conn, conn.cursor() as cursor:
+                cursor.execute(
+                    "SELECT employee_count FROM employee_counts WHERE company = %s AND year = %s",
+                    (company, year)
+                )
+                result = cursor.fetchone()
             
             if result and result[0] is not None:
                 # Only multiply by 1000 for Microsoft and Apple
                 # Their counts are stored in thousands (e.g., 164 means 164,000 employees)
-                employee_count = result[0] * 1000 if company in ['Microsoft', 'Apple'] else result[0]
-                
-                # Cache the result
-                self._employee_cache[cache_key] = employee_count
-                return employee_count
+                return result[0] * 1000 if company in ['Microsoft', 'Apple'] else result[0]
         except Exception as e:
-            # Silently fail for better performance
-            pass
+            raise _FallbackFailed(e) from e
         return None
-        
-    # Cache for advertising revenue data
-    _ad_revenue_cache = {}
-
-    # Cache for Nasdaq estimated market cap (annualized)
-    _nasdaq_market_cap_cache = {}
 
+    def get_employee_count(self, company, year):
+        """Get employee count for a specific company and year with caching"""
+        try:
+            return self._cached_employee_count(company, year)
+        except _FallbackFailed:
+            # Silently fail for better performance; the next call retries the database
+            return None
+        
     def _load_nasdaq_market_cap(self):
         """Lazy-load Nasdaq estimated market cap data from the Excel source."""
+        self.nasdaq_yearly = None
         if not self.data_path:
             return
         try:
-            df = pd.read_excel(self.data_path, sheet_name="Nasdaq Composite Est. (FRED)")
+            df = _excel_file(self.data_path).parse(sheet_name="Nasdaq Composite Est. (FRED)")
         except Exception:
             self.df_nasdaq_market_cap = pd.DataFrame()
             return
@@ -603,16 +807,22 @@ class FinancialDataProcessor:
             return
         out = df[[date_col, value_col]].copy()
         out = out.rename(columns={date_col: "date", value_col: "market_cap_usd"})
-        out["date"] = pd.to_datetime(out["date"], errors="coerce")
+        # Excel date cells already arrive as datetimes; only text dates need parsing
+        if not pd.api.types.is_datetime64_any_dtype(out["date"]):
+            out["date"] = pd.to_datetime(out["date"], errors="coerce")
         out["market_cap_usd"] = pd.to_numeric(out["market_cap_usd"], errors="coerce")
         out = out.dropna(subset=["date", "market_cap_usd"])
         out["year"] = out["date"].dt.year.astype(int)
         out = out.sort_values(["year", "date"])
         self.df_nasdaq_market_cap = out.reset_index(drop=True)
+        # Annualized values per method, computed once instead of filtering per lookup
+        by_year = self.df_nasdaq_market_cap.groupby("year")["market_cap_usd"]
+        self.nasdaq_yearly = {"year_end": by_year.last(), "average": by_year.mean()}
 
-    def get_nasdaq_market_cap(self, year, method: str = "year_end"):
+    def _get_nasdaq_market_cap_impl(self, year, method: str = "year_end"):
         """
-        Return an annualized Nasdaq market cap estimate for a given year.
+        Return an annualized Nasdaq market cap estimate for a given year
+        (cached per instance as get_nasdaq_market_cap).
 
         method:
           - 'year_end': last available observation in that year (default, best for market cap).
@@ -623,47 +833,23 @@ class FinancialDataProcessor:
         except (TypeError, ValueError):
             return None
 
-        cache_key = f"{year_int}:{method}"
-        if cache_key in self._nasdaq_market_cap_cache:
-            return self._nasdaq_market_cap_cache[cache_key]
-
         if self.df_nasdaq_market_cap is None:
             self._load_nasdaq_market_cap()
-        df = self.df_nasdaq_market_cap
-        if df is None or df.empty or "year" not in df.columns or "market_cap_usd" not in df.columns:
-            self._nasdaq_market_cap_cache[cache_key] = None
+        if not self.nasdaq_yearly:
             return None
 
-        sub = df[df["year"] == year_int]
-        if sub.empty:
-            # Fallback to the latest available year <= requested year.
-            eligible_years = df.loc[df["year"] <= year_int, "year"]
-            if eligible_years.empty:
-                self._nasdaq_market_cap_cache[cache_key] = None
-                return None
-            best_year = int(eligible_years.max())
-            sub = df[df["year"] == best_year]
-            if sub.empty:
-                self._nasdaq_market_cap_cache[cache_key] = None
-                return None
-
-        if method == "average":
-            value = float(sub["market_cap_usd"].mean())
-        else:
-            value = float(sub["market_cap_usd"].iloc[-1])
-
-        self._nasdaq_market_cap_cache[cache_key] = value
-        return value
+        # Requested year, or the latest available year before it
+        series = self.nasdaq_yearly["average" if method == "average" else "year_end"]
+        eligible = series.loc[:year_int]
+        if eligible.empty:
+            return None
+        return float(eligible.iloc[-1])
     
-    def get_advertising_revenue(self, company, year):
-        """Get advertising revenue data for a specific company and year with caching"""
-        # Check if result is already in cache
-        cache_key = f"{company}_{year}"
-        if cache_key in self._ad_revenue_cache:
-            return self._ad_revenue_cache[cache_key]
-
+    def _get_advertising_revenue_impl(self, company, year):
+        """Get advertising revenue data for a specific company and year (cached per instance as _cached_advertising_revenue)"""
         if self.df_ad_revenue is not None and not self.df_ad_revenue.empty:
-            self._normalize_ad_revenue_columns()
+            if self.ad_revenue_index is None:
+                self._normalize_ad_revenue_columns()
             try:
                 year = int(float(year))
             except (TypeError, ValueError):
@@ -682,42 +868,38 @@ class FinancialDataProcessor:
                 'Netflix': 'Netflix*'
             }
             column = col_map.get(company)
-            year_series = self.df_ad_revenue.get("year")
-            if year_series is None:
+            if self.ad_revenue_index is None:
                 # Extremely defensive: avoid crashing even if the sheet has unexpected headers.
-                self._ad_revenue_cache[cache_key] = None
                 return None
-            if column and column in self.df_ad_revenue.columns:
-                row = self.df_ad_revenue[year_series == year]
-                if not row.empty:
-                    value = self._to_number(pd.Series([row.iloc[0][column]])).iloc[0]
+            if column and column in self.ad_revenue_index.columns:
+                try:
+                    # Years are unique in the index, so .at reads the cell directly
+                    cell = self.ad_revenue_index.at[year, column]
+                except (KeyError, TypeError, ValueError):
+                    pass
+                else:
+                    value = self._to_number_scalar(cell)
                     ad_data = {
                         'value': value,
                         'is_estimate': False,
                         'unit': 'USD',
                         'formatted_value': format_ad_revenue(value, False, 'USD')
                     }
-                    self._ad_revenue_cache[cache_key] = ad_data
                     return ad_data
         if self.df_ad_revenue is None or self.df_ad_revenue.empty:
             self._load_ad_revenue()
             if self.df_ad_revenue is not None and not self.df_ad_revenue.empty:
-                return self.get_advertising_revenue(company, year)
+                return self._get_advertising_revenue_impl(company, year)
 
         try:
-            conn = psycopg2.connect(**self.db_params)
-            cur = conn.cursor()
-
-            query = """
-                SELECT revenue, is_estimate, unit
-                FROM advertising_revenue
-                WHERE company = %s AND year = %s
-            """
-            cur.execute(query, (company, year))
-            result = cur.fetchone()
-
-            cur.close()
-            conn.close()
+            with _pg_connection(**self.db_params) as conn, conn.cursor() as cur:
+                query = """
+                    SELECT revenue, is_estimate, unit
+                    FROM advertising_revenue
+                    WHERE company = %s AND year = %s
+                """
+                cur.execute(query, (company, year))
+                result = cur.fetchone()
 
             if result:
                 revenue, is_estimate, unit = result
@@ -727,26 +909,34 @@ class FinancialDataProcessor:
                     'unit': unit,
                     'formatted_value': format_ad_revenue(revenue, is_estimate, unit)
                 }
-                self._ad_revenue_cache[cache_key] = ad_data
                 return ad_data
-
-            self._ad_revenue_cache[cache_key] = None
             return None
-        except Exception:
+        except Exception as e:
+            raise _FallbackFailed(e) from e
+
+    def get_advertising_revenue(self, company, year):
+        """Get advertising revenue data for a specific company and year with caching"""
+        try:
+            return self._cached_advertising_revenue(company, year)
+        except _FallbackFailed:
             return None
 
 
     # Class variable for caching metrics data
     _metrics_cache = {}
     
-    @classmethod
-    def clear_cache(cls):
+    def clear_cache(self):
         """Clear all cached data"""
-        cls._metrics_cache.clear()
-        cls._segments_cache.clear()
-        cls._cash_balance_cache.clear()
-        cls._employee_cache.clear()
-        cls._ad_revenue_cache.clear()
+        self._metrics_cache.clear()
+        for lookup in (
+            self.get_market_cap,
+            self.get_cash_balance,
+            self._cached_employee_count,
+            self.get_nasdaq_market_cap,
+            self._cached_advertising_revenue,
+            self._frame_segments,
+        ):
+            lookup.cache_clear()
     
     def get_metrics(self, company, year):
         """Get authentic financial metrics from database"""
@@ -777,83 +967,134 @@ class FinancialDataProcessor:
             return metrics_dict
 
         try:
-            conn = psycopg2.connect(os.environ.get('DATABASE_URL'))
-            cur = conn.cursor()
-            cur.execute("SELECT metric_name, value FROM company_metrics WHERE company = %s AND year = %s", (clean_company, year))
-            results = cur.fetchall()
-            cur.close()
-            conn.close()
+            with _pg_connection(os.environ.get('DATABASE_URL')) as conn, conn.cursor() as cur:
+                cur.execute("SELECT metric_name, value FROM company_metrics WHERE company = %s AND year = %s", (clean_company, year))
+                results = cur.fetchall()
 
             if not results:
                 return None
-
-            metrics_dict = {
-                'Company': clean_company,
-                'Year': year,
-                'year': year,
-                'revenue': 0,
-                'net_income': 0,
-                'operating_income': 0,
-                'debt': 0,
-                'total_assets': 0,
-                'rd': 0,
-                'revenue_yoy': 0,
-                'net_income_yoy': 0,
-                'operating_income_yoy': 0,
-                'debt_yoy': 0,
-                'total_assets_yoy': 0,
-                'rd_yoy': 0
-            }
-            for metric_name, value in results:
-                if metric_name in metrics_dict:
-                    metrics_dict[metric_name] = float(value) if value else 0
-            return metrics_dict
+            return self._metrics_from_rows(clean_company, year, results)
         except Exception as e:
             print(f"Error fetching authentic revenue for {clean_company} {year}: {e}")
             return None
 
-    # Cache for segments data
-    _segments_cache = {}
-    
+    def _metrics_from_rows(self, company, year, rows):
+        """Build a get_metrics dict from (metric_name, value) database rows."""
+        metrics_dict = {
+            'Company': company,
+            'Year': year,
+            'year': year,
+            'revenue': 0,
+            'net_income': 0,
+            'operating_income': 0,
+            'debt': 0,
+            'total_assets': 0,
+            'rd': 0,
+            'revenue_yoy': 0,
+            'net_income_yoy': 0,
+            'operating_income_yoy': 0,
+            'debt_yoy': 0,
+            'total_assets_yoy': 0,
+            'rd_yoy': 0
+        }
+        for metric_name, value in rows:
+            if metric_name in metrics_dict:
+                metrics_dict[metric_name] = float(value) if value else 0
+        return metrics_dict
+
+    def get_metrics_bulk(self, pairs):
+        """
+        Get metrics for many (company, year) pairs at once.
+
+        Returns a dict mapping each pair as given to what get_metrics would return.
+        Sheet-backed lookups go through get_metrics; without the sheet, every pair is
+        fetched from the database in a single query instead of one round trip each.
+        """
+        pairs = list(dict.fromkeys(pairs))
+        if self.metrics_index is not None:
+            return {pair: self.get_metrics(*pair) for pair in pairs}
+
+        results = {}
+        wanted = {}
+        for pair in pairs:
+            company, year = pair
+            try:
+                wanted[pair] = (company.replace(" (Broadcaster)", ""), int(float(year)))
+            except (AttributeError, TypeError, ValueError):
+                results[pair] = None
+        if not wanted:
+            return results
+
+        companies, years = zip(*set(wanted.values()))
+        rows = defaultdict(list)
+        try:
+            with _pg_connection(os.environ.get('DATABASE_URL')) as conn, conn.cursor() as cur:
+                cur.execute(
+                    """
+                    SELECT company, year, metric_name, value
+                    FROM company_metrics
+                    WHERE (company, year) IN (SELECT * FROM unnest(%s::text[], %s::int[]))
+                    """,
+                    (list(companies), list(years))
+                )
+                for company, year, metric_name, value in cur.fetchall():
+                    rows[(company, int(year))].append((metric_name, value))
+        except Exception as e:
+            print(f"Error fetching authentic metrics for {len(wanted)} company-years: {e}")
+            rows.clear()
+
+        for pair, key in wanted.items():
+            results[pair] = self._metrics_from_rows(*key, rows[key]) if rows.get(key) else None
+        return results
+
+    def _frame_segments_impl(self, company, year):
+        """
+        Segment breakdown from df_segments, or None when the sheet has no rows for it.
+        Cached per instance as _frame_segments (cleared by load_data), so the
+        sequences are tuples that callers cannot mutate.
+        """
+        if self.segment_totals is None:
+            return None
+        try:
+            # Partial key on the sorted index: a Series of totals indexed by segment
+            totals = self.segment_totals.loc[(company, year)]
+        except (KeyError, TypeError):
+            return None
+        segments = totals.index
+        totals = totals[segments.notna() & (segments != 'Total Revenue')]
+        labels = tuple(totals.index.tolist())
+        values = tuple(totals.fillna(0).tolist())
+        colors = tuple(_SEGMENT_PALETTE[i % len(_SEGMENT_PALETTE)] for i in range(len(labels)))
+        return {'labels': labels, 'values': values, 'colors': colors}
+
     def get_segments(self, company, year):
         """Get revenue segments for a company and year from database"""
-        # FORCE FRESH DATA - NO CACHING
-        # cache_key = f"{company}_{year}"
-        # if cache_key in self._segments_cache:
-        #     return self._segments_cache[cache_key]
         try:
             year = int(float(year))
         except (TypeError, ValueError):
             year = year
 
-        if self.df_segments is not None and not self.df_segments.empty:
-            df = self.df_segments[
-                (self.df_segments['company'] == company) &
-                (self.df_segments['year'] == year)
-            ]
-            if not df.empty:
-                df = df[df['segment'].notna() & (df['segment'] != 'Total Revenue')]
-                df = df.groupby('segment', as_index=False)['revenue'].sum()
-                labels = df['segment'].tolist()
-                values = df['revenue'].fillna(0).tolist()
-                colors = ["#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd"] * ((len(labels) // 5) + 1)
-                return {'labels': labels, 'values': values, 'colors': colors[:len(labels)]}
+        segments = self._frame_segments(company, year)
+        if segments is not None:
+            return dict(segments)
 
         try:
-            conn = psycopg2.connect(os.environ.get('DATABASE_URL'))
-            cur = conn.cursor()
-            cur.execute("SELECT segment_name, revenue FROM company_segments WHERE company = %s AND year = %s AND segment_name != 'Total Revenue'", (company, year))
-            results = cur.fetchall()
-            cur.close()
-            conn.close()
+            with _pg_connection(os.environ.get('DATABASE_URL')) as conn, conn.cursor() as cur:
+                cur.execute(
+                    "SELECT segment_name, SUM(revenue) FROM company_segments "
+                    "WHERE company = %s AND year = %s AND segment_name <> 'Total Revenue' "
+                    "GROUP BY segment_name",
+                    (company, year)
+                )
+                results = cur.fetchall()
 
             if results:
                 labels = [row[0] for row in results]
                 values = [float(row[1]) if row[1] is not None else 0 for row in results]
-                colors = ["#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd"][:len(labels)]
+                colors = [_SEGMENT_PALETTE[i % len(_SEGMENT_PALETTE)] for i in range(len(labels))]
                 return {'labels': labels, 'values': values, 'colors': colors}
 
-            return {'labels': [company], 'values': [1], 'colors': ["#1f77b4"]}
+            return {'labels': [company], 'values': [1], 'colors': [_SEGMENT_PALETTE[0]]}
         except Exception as e:
             print(f"Error getting segments for {company} in {year}: {e}")
             return {'labels': [company], 'values': [1], 'colors': ["#cccccc"]}
@@ -17,11 +17,12 @@ from data_processor import FinancialDataProcessor
 from subscriber_data_processor import SubscriberDataProcessor
 from utils.state_management import get_data_processor, initialize_session_state
 from utils.animation_helper import update_chart_layout, create_consistent_frame, get_dynamic_tick_values, create_animation_buttons
-from utils.styles import get_page_style
+from utils.styles import apply_plotly_theme, get_page_style
 from utils.components import load_company_logos
 from utils.data_loader import CONTINENT_MAPPINGS, AD_MACRO_CATEGORIES
 
 st.markdown(get_page_style(), unsafe_allow_html=True)
+apply_plotly_theme()
 
 # Streamlit markdown can treat indented HTML as a code block. Normalize HTML blocks to avoid that.
 def _html_block(html: str) -> str:
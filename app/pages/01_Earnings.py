@@ -19,7 +19,7 @@ from PIL import Image
 from utils import format_number
 from utils.auth import check_password
 from utils.state_management import get_data_processor
-from utils.styles import get_page_style
+from utils.styles import apply_plotly_theme, get_page_style
 
 # Page config must be the first Streamlit command
 st.set_page_config(page_title="Earnings", page_icon="E", layout="wide")
@@ -30,6 +30,7 @@ logger = logging.getLogger(__name__)
 
 check_password()
 st.markdown(get_page_style(), unsafe_allow_html=True)
+apply_plotly_theme()
 st.markdown(
     """
     <style>
@@ -1948,7 +1949,7 @@ def build_metric_heatmap_data(metrics_df, companies, metric_key, year_start, yea
     ][["company", "year", metric_key]].dropna()
     if df.empty:
         return pd.DataFrame()
-    df = df.groupby(["company", "year"], as_index=False)[metric_key].sum()
+    df = df.groupby(["company", "year"], as_index=False, observed=True)[metric_key].sum()
     df["year"] = pd.to_numeric(df["year"], errors="coerce").astype("Int64")
     years = list(range(int(year_start), int(year_end) + 1))
     pivot = df.pivot(index="company", columns="year", values=metric_key)
@@ -3440,7 +3441,7 @@ if selected_metrics and has_metrics_source:
                 change_label = "QoQ"
             else:
                 df_metric = df_metric.sort_values(["company", "year"])
-                df_metric["yoy"] = df_metric.groupby("company")["value"].pct_change() * 100
+                df_metric["yoy"] = df_metric.groupby("company", observed=True)["value"].pct_change() * 100
                 df_metric["yoy_label"] = df_metric["yoy"].apply(lambda v: format_yoy_label(v, "%"))
                 x_col = "year"
                 change_label = "YoY"
@@ -20,10 +20,11 @@ from PIL import Image
 import base64
 import os
 from io import BytesIO
-from utils.styles import get_page_style, get_animation_style
+from utils.styles import apply_plotly_theme, get_page_style, get_animation_style
 
 # Apply global styles at page load for better performance
 st.markdown(get_page_style(), unsafe_allow_html=True)
+apply_plotly_theme()
 st.markdown(get_animation_style(), unsafe_allow_html=True)
 
 # Add header with language selector
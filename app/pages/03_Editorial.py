@@ -9,7 +9,7 @@ import plotly.graph_objects as go
 from subscriber_data_processor import SubscriberDataProcessor
 import pandas as pd
 from datetime import datetime, timedelta
-from utils.styles import get_page_style, get_animation_style
+from utils.styles import apply_plotly_theme, get_page_style, get_animation_style
 import base64
 from PIL import Image
 import os
@@ -22,6 +22,7 @@ apply_page_transition_fix()
 
 # Apply shared styles
 st.markdown(get_page_style(), unsafe_allow_html=True)
+apply_plotly_theme()
 st.markdown(get_animation_style(), unsafe_allow_html=True)
 
 # Add header with language selector
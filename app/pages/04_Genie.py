@@ -18,7 +18,7 @@ from datetime import datetime
 from data_processor import FinancialDataProcessor
 from utils.data_loader import load_advertising_data, get_available_filters
 from utils.components import render_ai_assistant
-from utils.styles import load_common_styles, load_genie_specific_styles
+from utils.styles import apply_plotly_theme, load_common_styles, load_genie_specific_styles
 from utils.enhanced_chat_interface import render_enhanced_chat_interface
 from utils.m2_supply_data import get_m2_monthly_data, get_m2_annual_data, create_m2_visualization
 from utils.bitcoin_analysis import get_bitcoin_monthly_returns, create_bitcoin_monthly_returns_chart, render_bitcoin_analysis_section
@@ -40,6 +40,7 @@ logging.basicConfig(level=logging.INFO)
 # Apply shared styles
 load_common_styles()
 load_genie_specific_styles()
+apply_plotly_theme()
 
 # Add header with language selector
 from utils.header import render_header
@@ -875,8 +876,10 @@ if selected_metrics or selected_company_metrics or selected_segment_options or s
     def get_company_metric_data(company, metric_name, metric_key, filtered_years, data_processor):
         metric_data = []
         try:
+            # Every year in one call: a single query when metrics come from the database
+            metrics_by_year = data_processor.get_metrics_bulk([(company, year) for year in filtered_years])
             for year in filtered_years:
-                metrics = get_cached_metrics(company, year)
+                metrics = metrics_by_year.get((company, year))
                 if metrics and metric_key in metrics:
                     value = metrics[metric_key]
                     if value is not None:
@@ -14,8 +14,9 @@ from io import StringIO
 st.set_page_config(page_title="SQL Manager", page_icon="🔧", layout="wide")
 
 # Apply shared page styles
-from utils.styles import get_page_style
+from utils.styles import apply_plotly_theme, get_page_style
 st.markdown(get_page_style(), unsafe_allow_html=True)
+apply_plotly_theme()
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -10,6 +10,7 @@ import plotly.graph_objects as go
 from datetime import datetime
 import logging
 import streamlit as st
+from contextlib import closing
 from functools import lru_cache
 from typing import Optional
 
@@ -104,17 +105,15 @@ def get_m2_monthly_data(start_year=1999, end_year=None):
         pass
 
     try:
-        conn = get_connection()
-        cur = conn.cursor()
-        
-        cur.execute("""
-            SELECT date, value, year, month, monthly_growth
-            FROM m2_supply_monthly
-            WHERE year >= %s AND year <= %s
-            ORDER BY date
-        """, (start_year, end_year))
-        
-        data = cur.fetchall()
+        with closing(get_connection()) as conn, conn.cursor() as cur:
+            cur.execute("""
+                SELECT date, value, year, month, monthly_growth
+                FROM m2_supply_monthly
+                WHERE year >= %s AND year <= %s
+                ORDER BY date
+            """, (start_year, end_year))
+            
+            data = cur.fetchall()
         
         # Create DataFrame
         df = pd.DataFrame(data, columns=['date', 'value', 'year', 'month', 'monthly_growth'])
@@ -130,9 +129,6 @@ def get_m2_monthly_data(start_year=1999, end_year=None):
         df['value'] = pd.to_numeric(df['value'])
         df['monthly_growth'] = pd.to_numeric(df['monthly_growth'])
         
-        cur.close()
-        conn.close()
-        
         return df
     
     except Exception as e:
@@ -169,18 +165,30 @@ def get_m2_annual_data(start_year=1999, end_year=None):
         pass
 
     try:
-        conn = get_connection()
-        cur = conn.cursor()
-        
-        # Get annual data from the database
-        cur.execute("""
-            SELECT year, value, annual_growth
-            FROM m2_supply_annual
-            WHERE year >= %s AND year <= %s
-            ORDER BY year
-        """, (start_year, end_year))
-        
-        data = cur.fetchall()
+        current_year = datetime.now().year
+        latest_monthly = None
+        with closing(get_connection()) as conn, conn.cursor() as cur:
+            # Get annual data from the database
+            cur.execute("""
+                SELECT year, value, annual_growth
+                FROM m2_supply_annual
+                WHERE year >= %s AND year <= %s
+                ORDER BY year
+            """, (start_year, end_year))
+            
+            data = cur.fetchall()
+            
+            if any(row[0] == current_year for row in data):
+                # Get the latest monthly data for the current year
+                cur.execute("""
+                    SELECT date, value 
+                    FROM m2_supply_monthly 
+                    WHERE year = %s 
+                    ORDER BY date DESC 
+                    LIMIT 1
+                """, (current_year,))
+                
+                latest_monthly = cur.fetchone()
         
         # Create DataFrame
         df = pd.DataFrame(data, columns=['year', 'value', 'annual_growth'])
@@ -197,37 +205,22 @@ def get_m2_annual_data(start_year=1999, end_year=None):
         df['annual_growth'] = pd.to_numeric(df['annual_growth'])
         
         # For the current year, we want to update the value to the latest monthly data
-        current_year = datetime.now().year
-        if current_year in df['year'].values:
-            # Get the latest monthly data for the current year
-            cur.execute("""
-                SELECT date, value 
-                FROM m2_supply_monthly 
-                WHERE year = %s 
-                ORDER BY date DESC 
-                LIMIT 1
-            """, (current_year,))
+        if latest_monthly:
+            latest_date, latest_value = latest_monthly
             
-            latest_monthly = cur.fetchone()
-            if latest_monthly:
-                latest_date, latest_value = latest_monthly
-                
-                # Convert decimal to float for consistency
-                if hasattr(latest_value, 'to_eng_string'):  # It's a Decimal
-                    latest_value = float(latest_value)
-                
-                # Update the current year's annual value to use the latest monthly value
-                df.loc[df['year'] == current_year, 'value'] = latest_value
-                
-                # Calculate new annual growth if possible
-                if current_year - 1 in df['year'].values:
-                    previous_year_value = float(df.loc[df['year'] == current_year - 1, 'value'].iloc[0])
-                    if previous_year_value > 0:
-                        new_growth = ((latest_value - previous_year_value) / previous_year_value) * 100
-                        df.loc[df['year'] == current_year, 'annual_growth'] = new_growth
-        
-        cur.close()
-        conn.close()
+            # Convert decimal to float for consistency
+            if hasattr(latest_value, 'to_eng_string'):  # It's a Decimal
+                latest_value = float(latest_value)
+            
+            # Update the current year's annual value to use the latest monthly value
+            df.loc[df['year'] == current_year, 'value'] = latest_value
+            
+            # Calculate new annual growth if possible
+            if current_year - 1 in df['year'].values:
+                previous_year_value = float(df.loc[df['year'] == current_year - 1, 'value'].iloc[0])
+                if previous_year_value > 0:
+                    new_growth = ((latest_value - previous_year_value) / previous_year_value) * 100
+                    df.loc[df['year'] == current_year, 'annual_growth'] = new_growth
         
         return df
     
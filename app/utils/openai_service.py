@@ -3,34 +3,55 @@ Servizio OpenAI per la generazione di query SQL da linguaggio naturale e gestion
 """
 import os
 import json
-import openai
 import re
+import sys
+import hashlib
 import logging
+import threading
+import weakref
+from collections import OrderedDict, namedtuple
+from functools import lru_cache
+
+# orjson è opzionale: se manca, lo schema viene serializzato con json
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def initialize_openai_client(api_key=None):
-    """Inizializza il client OpenAI con la chiave API."""
+# Blocco di codice markdown attorno alla SQL restituita dal modello (recinzioni opzionali)
+_FENCE_RE = re.compile(r'\A(?:```(?:sql)?)?\s*(.*?)\s*(?:```)?\Z', re.S | re.I)
+
+@lru_cache(maxsize=1)
+def _openai():
+    """
+    Importa l'SDK openai al primo utilizzo.
+
+    L'import è costoso (httpx, pydantic) e non serve a chi usa solo i classificatori.
+    """
+    import openai
+    return openai
+
+def _resolve_api_key(api_key=None):
+    """Restituisce la chiave API fornita o, in mancanza, quella in OPENAI_API_KEY."""
     if api_key:
-        openai.api_key = api_key
+        return api_key
     elif 'OPENAI_API_KEY' in os.environ:
-        openai.api_key = os.environ["OPENAI_API_KEY"]
+        return os.environ["OPENAI_API_KEY"]
     else:
         raise ValueError("Chiave API OpenAI non fornita")
 
-def is_about_specific_country(query):
-    """
-    Verifica se la query riguarda un paese o una regione specifica.
-    
-    Args:
-        query (str): La query in linguaggio naturale
-        
-    Returns:
-        bool: True se la query menziona un paese specifico, False altrimenti
-    """
-    # Lista di paesi e regioni comuni nel nostro database
-    countries = [
+def initialize_openai_client(api_key=None):
+    """Inizializza il client OpenAI con la chiave API."""
+    _openai().api_key = _resolve_api_key(api_key)
+
+# Parole chiave usate dai classificatori delle query, raggruppate per categoria
+_KEYWORDS = {
+    # Paesi e regioni comuni nel nostro database
+    'country': (
         'Italy', 'Italia', 'Italian', 'Italiano', 'Italiana',
         'Spain', 'España', 'Spanish', 'Español', 'Española',
         'France', 'Francia', 'French', 'Francese', 'Francesa',
@@ -52,29 +73,10 @@ def is_about_specific_country(query):
         'North America', 'America del Nord', 'Nord America', 'Norteamérica',
         'South America', 'America del Sud', 'Sud America', 'Sudamérica',
         'Latin America', 'America Latina', 'América Latina'
-    ]
-    
-    # Verifica se è menzionato un paese nella query
-    query_lower = query.lower()
-    for country in countries:
-        if country.lower() in query_lower:
-            return True
-    
-    return False
-
-def is_about_tv_or_advertising(query):
-    """
-    Verifica se la query riguarda la TV o la pubblicità.
-    
-    Args:
-        query (str): La query in linguaggio naturale
-        
-    Returns:
-        bool: True se la query menziona TV o pubblicità, False altrimenti
-    """
+    ),
     # Termini relativi a TV e pubblicità in diverse lingue
-    ad_terms = [
-        'TV', 'television', 'televisione', 'televisión', 
+    'ad': (
+        'TV', 'television', 'televisione', 'televisión',
         'ad', 'ads', 'advert', 'advertising', 'pubblicità', 'publicidad',
         'commercial', 'commercials', 'spot', 'spots', 'campaign', 'campaigns',
         'media', 'spend', 'spending', 'spesa', 'gasto',
@@ -82,66 +84,26 @@ def is_about_tv_or_advertising(query):
         'OOH', 'out of home', 'esterna', 'exterior',
         'radio', 'print', 'stampa', 'newspaper', 'giornale', 'periódico',
         'magazine', 'rivista', 'revista', 'cinema'
-    ]
-    
-    # Verifica se è menzionato un termine relativo a TV o pubblicità nella query
-    query_lower = query.lower()
-    for term in ad_terms:
-        if term.lower() in query_lower:
-            return True
-    
-    return False
-
-def is_about_global_advertising(query):
-    """
-    Verifica se la query riguarda dati pubblicitari globali per tutti i paesi.
-    
-    Args:
-        query (str): La query in linguaggio naturale
-        
-    Returns:
-        bool: True se la query richiede dati pubblicitari per tutti i paesi, False altrimenti
-    """
-    query_lower = query.lower()
-    
+    ),
     # Termini che indicano una richiesta di dati globali
-    global_terms = [
+    'global': (
         'all countries', 'tutti i paesi', 'todos los países',
-        'every country', 'ogni paese', 'cada país', 
-        'each country', 'ciascun paese', 'cada país',
+        'every country', 'ogni paese', 'cada país',
+        'each country', 'ciascun paese',
         'list countries', 'lista paesi', 'lista países',
         'list all', 'elenca tutti', 'enumera todos',
         'global', 'mondiale', 'mundial',
         'sort by', 'ordinati per', 'ordenados por',
         'highest spend', 'spesa più alta', 'gasto más alto',
         'total ad spend', 'spesa pubblicitaria totale', 'gasto publicitario total'
-    ]
-    
-    # Verifica se è una query sul totale della spesa pubblicitaria globale
-    for term in global_terms:
-        if term in query_lower:
-            return is_about_tv_or_advertising(query)  # Deve essere anche una query sulla pubblicità
-    
-    return False
-
-def is_about_company_metrics(query):
-    """
-    Verifica se la query riguarda metriche finanziarie di un'azienda.
-    
-    Args:
-        query (str): La query in linguaggio naturale
-        
-    Returns:
-        bool: True se la query riguarda metriche aziendali, False altrimenti
-    """
+    ),
     # Nomi di aziende comuni nel database
-    companies = [
+    'company': (
         'Alphabet', 'Google', 'Apple', 'Microsoft', 'Amazon', 'Meta', 'Facebook',
         'Netflix', 'Disney', 'Warner', 'Paramount', 'Comcast', 'Spotify'
-    ]
-    
+    ),
     # Metriche finanziarie comuni
-    metrics = [
+    'metric': (
         'revenue', 'revenues', 'ricavi', 'ingresos',
         'profit', 'profits', 'profitto', 'profitti', 'beneficio', 'beneficios',
         'income', 'net income', 'reddito', 'reddito netto', 'ingreso', 'ingreso neto',
@@ -151,62 +113,16 @@ def is_about_company_metrics(query):
         'assets', 'attivi', 'activos',
         'debt', 'debito', 'deuda',
         'cash', 'liquidity', 'liquidità', 'liquidez'
-    ]
-    
-    # Verifica se sono menzionati sia un'azienda che una metrica
-    query_lower = query.lower()
-    company_mentioned = any(company.lower() in query_lower for company in companies)
-    metric_mentioned = any(metric.lower() in query_lower for metric in metrics)
-    
-    return company_mentioned and metric_mentioned
-
-def is_about_ad_revenue_2024(query):
-    """
-    Verifica se la query riguarda specificamente i dati di advertising revenue 2024.
-    
-    Args:
-        query (str): La query in linguaggio naturale
-        
-    Returns:
-        bool: True se la query riguarda advertising revenue 2024, False altrimenti
-    """
-    query_lower = query.lower()
-    
-    # Check if the query mentions "advertising revenue" and "2024"
-    has_ad_revenue = any(term in query_lower for term in [
-        'advertising revenue', 'ad revenue', 'revenue from ads', 
+    ),
+    'ad_revenue': (
+        'advertising revenue', 'ad revenue', 'revenue from ads',
         'ricavi pubblicitari', 'ingresos publicitarios',
         'ricavi da pubblicità', 'ingresos por publicidad',
         'top advertisers', 'maggiori inserzionisti', 'principales anunciantes'
-    ])
-    
-    has_2024 = '2024' in query_lower
-    
-    # If the query is specifically about 2024 advertising revenue
-    if has_ad_revenue and has_2024:
-        return True
-    
-    return False
-
-def is_about_insights(query):
-    """
-    Verifica se la query riguarda insights, segmenti o iniziative aziendali.
-    Includes detection of "what did [company] do in [year]" type queries.
-    
-    Args:
-        query (str): La query in linguaggio naturale
-        
-    Returns:
-        bool: True se la query riguarda insights o segmenti, False altrimenti
-    """
-    # Nomi di aziende comuni nel database
-    companies = [
-        'Alphabet', 'Google', 'Apple', 'Microsoft', 'Amazon', 'Meta', 'Facebook',
-        'Netflix', 'Disney', 'Warner', 'Paramount', 'Comcast', 'Spotify'
-    ]
-    
+    ),
+    'year_2024': ('2024',),
     # Termini relativi a insights e segmenti
-    insight_terms = [
+    'insight': (
         'insight', 'insights', 'initiative', 'initiatives', 'iniziativa', 'iniziative',
         'strategy', 'strategies', 'strategia', 'strategie', 'estrategia', 'estrategias',
         'segment', 'segments', 'segmento', 'segmenti', 'segmentos',
@@ -218,118 +134,272 @@ def is_about_insights(query):
         'plan', 'piano', 'planning', 'pianificazione', 'planificación',
         'activities', 'attività', 'actividades',
         'action', 'actions', 'azione', 'azioni', 'acción', 'acciones'
-    ]
-    
+    ),
     # Activity verbs to identify "what did [company] do" type queries
-    activity_verbs = [
+    'activity': (
         'do', 'did', 'done', 'fare', 'fatto', 'ha fatto', 'fece', 'hacer', 'hizo',
         'achieve', 'achieved', 'ottenere', 'ottenuto', 'lograr', 'logró',
         'accomplish', 'accomplished', 'compiere', 'compiuto', 'realizar', 'realizó',
         'work on', 'worked on', 'lavorare su', 'lavorato su', 'trabajar en', 'trabajó en'
-    ]
+    ),
+    # Bitcoin-related terms
+    'bitcoin': (
+        'bitcoin', 'btc', 'crypto', 'cryptocurrency',
+        'instead of cash', 'held bitcoin', 'invested in bitcoin',
+        'what if', 'scenario', 'alternative investment'
+    ),
+    # Investment or cash terms
+    'investment': (
+        'cash', 'investment', 'hold', 'held', 'invest', 'invested',
+        'reserve', 'balance', 'treasury', 'asset', 'cash balance'
+    ),
+    # "instead of" pattern which is very common in Bitcoin scenario queries
+    'bitcoin_hint': ('instead of', 'had bitcoin'),
+}
+
+# Le stesse parole chiave in minuscolo, senza duplicati e internate: le stringhe
+# sono condivise da indice, automa e risultati di _classify
+_TERMS = {
+    category: frozenset(sys.intern(term.lower()) for term in terms)
+    for category, terms in _KEYWORDS.items()
+}
+
+
+# Una parola della query: i termini composti solo da una parola si cercano
+# nell'indice _TOKEN_CATEGORIES, le frasi con più parole tramite _phrase_automaton()
+_TOKEN_RE = re.compile(r'\w+')
+
+# Numeri di 4 cifre che possono essere anni (1900-2099)
+_YEAR_RE = re.compile(r'\b(?:19|20)\d{2}\b')
+
+
+def _build_token_index():
+    """Indice parola -> categorie per tutti i termini di una sola parola di _TERMS."""
+    index = {}
+    for category, terms in _TERMS.items():
+        for term in terms:
+            if _TOKEN_RE.fullmatch(term):
+                index.setdefault(term, set()).add(category)
+    return {term: tuple(categories) for term, categories in index.items()}
+
+
+_TOKEN_CATEGORIES = _build_token_index()
+
+
+def _tokenize(query_lower):
+    """Restituisce l'insieme delle parole di una query già in minuscolo."""
+    return frozenset(_TOKEN_RE.findall(query_lower))
+
+
+@lru_cache(maxsize=1)
+def _phrase_automaton():
+    """
+    Costruisce un unico automa sulle frasi di più parole presenti in _TERMS.
+
+    Il pattern cerca, a ogni inizio di parola della query, la frase più lunga
+    che inizia e finisce a confine di parola (lookahead, quindi anche le
+    occorrenze sovrapposte, e "list all" non scatta su "list allocations"); la tabella
+    associata riporta per quella frase tutte le coppie (frase, categoria) delle
+    frasi che contiene parola per parola, così una sola scansione basta.
+    """
+    categories = {}
+    for category, terms in _TERMS.items():
+        for term in terms:
+            if not _TOKEN_RE.fullmatch(term):
+                categories.setdefault(term, set()).add(category)
+
+    hits = {
+        phrase: tuple(
+            (other, category)
+            for other, other_categories in categories.items()
+            if f' {other} ' in f' {phrase} '
+            for category in other_categories
+        )
+        for phrase in categories
+    }
+    alternation = '|'.join(re.escape(phrase) for phrase in sorted(categories, key=len, reverse=True))
+    return re.compile(rf'(?=\b({alternation})\b)'), hits
+
+
+def _classify(query_lower):
+    """
+    Analizza la query (già in minuscolo) una sola volta e restituisce, per ogni
+    categoria di _TERMS, l'insieme dei termini trovati (più gli anni citati in 'year').
+    """
+    # Una sola consultazione dell'indice per parola: le parole che non sono
+    # parole chiave (la maggior parte) escono subito
+    matches = {category: set() for category in _TERMS}
+    for token in _tokenize(query_lower):
+        for category in _TOKEN_CATEGORIES.get(token, ()):
+            matches[category].add(token)
+
+    pattern, hits = _phrase_automaton()
+    for match in pattern.finditer(query_lower):
+        for phrase, category in hits[match.group(1)]:
+            matches[category].add(phrase)
+
+    # Check for year patterns (4 digit numbers that could be years)
+    matches['year'] = set(_YEAR_RE.findall(query_lower))
+    return matches
+
+# Esito di _classify_all: una classificazione booleana per ogni tipo di query
+_Flags = namedtuple('_Flags', (
+    'country', 'tv_or_advertising', 'global_advertising', 'company_metrics',
+    'ad_revenue_2024', 'insights', 'bitcoin',
+))
+
+def _classify_all(query, _q_lower=None):
+    """
+    Calcola in un colpo solo tutte le classificazioni usate da generate_sql_query.
+
+    Chi ha già la query in minuscolo la passa in _q_lower, così lower() non
+    viene ripetuto; altrimenti viene calcolata qui una volta sola.
+    """
+    return _classify_lowered(query.lower() if _q_lower is None else _q_lower)
+
+@lru_cache(maxsize=2048)
+def _classify_lowered(query_lower):
+    """
+    Corpo di _classify_all, memorizzato sulla query in minuscolo: le chiamate
+    ripetute sulla stessa richiesta (e i prompt che differiscono solo per
+    maiuscole/minuscole) non rianalizzano il testo.
+    """
+    matches = _classify(query_lower)
+    company_mentioned = bool(matches['company'])
+
+    # Bitcoin scenario score: distinct terms per group, taken from the same scan
+    bitcoin_count = len(matches['bitcoin'])
+    investment_count = len(matches['investment'])
+
+    # Detect "instead of" pattern which is very common in Bitcoin scenario queries
+    instead_of_pattern = bool(matches['bitcoin_hint'])
+
+    return _Flags(
+        country=bool(matches['country']),
+        tv_or_advertising=bool(matches['ad']),
+        # Deve essere anche una query sulla pubblicità
+        global_advertising=bool(matches['global']) and bool(matches['ad']),
+        # Verifica se sono menzionati sia un'azienda che una metrica
+        company_metrics=company_mentioned and bool(matches['metric']),
+        # Check if the query mentions "advertising revenue" and "2024"
+        ad_revenue_2024=bool(matches['ad_revenue']) and bool(matches['year_2024']),
+        # Consider it an insights query if:
+        # 1. A company and any insight term is mentioned, OR
+        # 2. A company, an activity verb, and a year are all mentioned (e.g., "What did Apple do in 2023?")
+        insights=company_mentioned and (
+            bool(matches['insight']) or (bool(matches['activity']) and bool(matches['year']))
+        ),
+        # Consider a Bitcoin investment query if:
+        # 1. Multiple Bitcoin terms appear, or
+        # 2. At least one Bitcoin term appears along with investment terms
+        #    (this also covers "bitcoin" + a company name + investment terms), or
+        # 3. The query contains an "instead of" pattern with Bitcoin
+        bitcoin=(
+            bitcoin_count >= 2 or
+            (bitcoin_count >= 1 and investment_count >= 1) or
+            (instead_of_pattern and "bitcoin" in matches['bitcoin'])
+        ),
+    )
+
+def is_about_specific_country(query, _q_lower=None):
+    """
+    Verifica se la query riguarda un paese o una regione specifica.
     
-    query_lower = query.lower()
+    Args:
+        query (str): La query in linguaggio naturale
+        _q_lower (str, optional): La query già in minuscolo, se disponibile
+        
+    Returns:
+        bool: True se la query menziona un paese specifico, False altrimenti
+    """
+    return _classify_all(query, _q_lower).country
+
+def is_about_tv_or_advertising(query, _q_lower=None):
+    """
+    Verifica se la query riguarda la TV o la pubblicità.
     
-    # Check if a company is mentioned
-    company_mentioned = any(company.lower() in query_lower for company in companies)
+    Args:
+        query (str): La query in linguaggio naturale
+        _q_lower (str, optional): La query già in minuscolo, se disponibile
+        
+    Returns:
+        bool: True se la query menziona TV o pubblicità, False altrimenti
+    """
+    return _classify_all(query, _q_lower).tv_or_advertising
+
+def is_about_global_advertising(query, _q_lower=None):
+    """
+    Verifica se la query riguarda dati pubblicitari globali per tutti i paesi.
     
-    # Check if any typical insight terms are mentioned
-    insight_term_mentioned = any(term.lower() in query_lower for term in insight_terms)
+    Args:
+        query (str): La query in linguaggio naturale
+        _q_lower (str, optional): La query già in minuscolo, se disponibile
+        
+    Returns:
+        bool: True se la query richiede dati pubblicitari per tutti i paesi, False altrimenti
+    """
+    return _classify_all(query, _q_lower).global_advertising
+
+def is_about_company_metrics(query, _q_lower=None):
+    """
+    Verifica se la query riguarda metriche finanziarie di un'azienda.
     
-    # Check for activity verbs (what did company DO)
-    activity_verb_mentioned = any(verb.lower() in query_lower for verb in activity_verbs)
+    Args:
+        query (str): La query in linguaggio naturale
+        _q_lower (str, optional): La query già in minuscolo, se disponibile
+        
+    Returns:
+        bool: True se la query riguarda metriche aziendali, False altrimenti
+    """
+    return _classify_all(query, _q_lower).company_metrics
+
+def is_about_ad_revenue_2024(query, _q_lower=None):
+    """
+    Verifica se la query riguarda specificamente i dati di advertising revenue 2024.
     
-    # Check for year patterns (4 digit numbers that could be years)
-    import re
-    year_pattern = r'\b(19|20)\d{2}\b'  # Matches years like 1990-2099
-    year_mentioned = bool(re.search(year_pattern, query_lower))
+    Args:
+        query (str): La query in linguaggio naturale
+        _q_lower (str, optional): La query già in minuscolo, se disponibile
+        
+    Returns:
+        bool: True se la query riguarda advertising revenue 2024, False altrimenti
+    """
+    return _classify_all(query, _q_lower).ad_revenue_2024
+
+def is_about_insights(query, _q_lower=None):
+    """
+    Verifica se la query riguarda insights, segmenti o iniziative aziendali.
+    Includes detection of "what did [company] do in [year]" type queries.
     
-    # Consider it an insights query if:
-    # 1. A company and any insight term is mentioned, OR
-    # 2. A company, an activity verb, and a year are all mentioned (e.g., "What did Apple do in 2023?")
-    return (company_mentioned and insight_term_mentioned) or (company_mentioned and activity_verb_mentioned and year_mentioned)
+    Args:
+        query (str): La query in linguaggio naturale
+        _q_lower (str, optional): La query già in minuscolo, se disponibile
+        
+    Returns:
+        bool: True se la query riguarda insights o segmenti, False altrimenti
+    """
+    return _classify_all(query, _q_lower).insights
 
-def is_bitcoin_scenario_query(query):
+def is_bitcoin_scenario_query(query, _q_lower=None):
     """
     Check if the query is asking about a Bitcoin investment scenario.
     
     Args:
         query (str): The natural language query
+        _q_lower (str, optional): The query already lowercased, if available
         
     Returns:
         bool: True if the query is about Bitcoin investments, False otherwise
     """
-    query_lower = query.lower()
-    
-    # Bitcoin-related terms
-    bitcoin_terms = [
-        'bitcoin', 'btc', 'crypto', 'cryptocurrency',
-        'instead of cash', 'held bitcoin', 'invested in bitcoin',
-        'what if', 'scenario', 'alternative investment'
-    ]
-    
-    # Investment or cash terms
-    investment_terms = [
-        'cash', 'investment', 'hold', 'held', 'invest', 'invested',
-        'reserve', 'balance', 'treasury', 'asset', 'cash balance'
-    ]
-    
-    # Company terms and names
-    company_terms = [
-        'apple', 'microsoft', 'amazon', 'google', 'meta', 'alphabet',
-        'tesla', 'netflix', 'spotify', 'disney', 'roku', 'comcast',
-        'warner', 'paramount', 'company', 'companies', 'tech'
-    ]
-    
-    # Count matches
-    bitcoin_count = sum(1 for term in bitcoin_terms if term in query_lower)
-    investment_count = sum(1 for term in investment_terms if term in query_lower)
-    company_count = sum(1 for term in company_terms if term in query_lower)
-    
-    # Detect "instead of" pattern which is very common in Bitcoin scenario queries
-    instead_of_pattern = "instead of" in query_lower or "had bitcoin" in query_lower
-    
-    # Consider a Bitcoin investment query if:
-    # 1. Multiple Bitcoin terms appear, or
-    # 2. At least one Bitcoin term appears along with investment terms, or
-    # 3. The query contains "bitcoin", a company name, and investment terms
-    # 4. The query contains an "instead of" pattern with Bitcoin
-    is_bitcoin_query = (
-        bitcoin_count >= 2 or 
-        (bitcoin_count >= 1 and investment_count >= 1) or
-        (bitcoin_count >= 1 and company_count >= 1 and investment_count >= 1) or
-        (instead_of_pattern and "bitcoin" in query_lower)
-    )
+    is_bitcoin_query = _classify_all(query, _q_lower).bitcoin
     
     if is_bitcoin_query:
         logger.info(f"Detected Bitcoin investment scenario query: {query}")
     
     return is_bitcoin_query
 
-def generate_sql_query(prompt, schema, api_key=None):
-    """
-    Genera una query SQL a partire da una richiesta in linguaggio naturale
-    utilizzando OpenAI.
-    
-    Args:
-        prompt (str): La richiesta in linguaggio naturale
-        schema (str): Lo schema del database in formato stringa JSON
-        api_key (str, optional): La chiave API di OpenAI (opzionale se già in env)
-    
-    Returns:
-        str: La query SQL generata
-    """
-    try:
-        # Check for special query types that shouldn't be converted to SQL
-        if is_bitcoin_scenario_query(prompt):
-            logger.info(f"Query involves Bitcoin investment scenario, bypassing SQL generation")
-            return "/* This is a Bitcoin investment scenario query and will be handled by a special calculator */"
-            
-        # Inizializza il client OpenAI
-        initialize_openai_client(api_key)
-        
-        # Aggiungi indicazioni specifiche per query su paesi e pubblicità
-        specific_instructions = """
+# Indicazioni di base per il modello (scala delle metriche, insights, indicatori macro)
+_INSTR_BASE = """
         IMPORTANT NOTE ON METRIC SCALES:
         In the company_metrics table, financial values are stored in millions:
         - $1 billion should be queried as value > 1000 (not 1000000000)
@@ -378,10 +448,9 @@ def generate_sql_query(prompt, schema, api_key=None):
              * "How has USD purchasing power changed since 2000?"
              * "Adjust Apple's revenue for inflation from 2020 to 2024"
         """
-        
-        # Istruzioni per query su paesi e pubblicità
-        if is_about_specific_country(prompt) and is_about_tv_or_advertising(prompt):
-            specific_instructions += """
+
+# Istruzioni per query su paesi e pubblicità
+_INSTR_COUNTRY_AD = """
             Per query che menzionano paesi specifici e dati sulla pubblicità:
             - Usa la tabella advertising_data e regions per ottenere dati specifici per paese
             - Se la query menziona "Free TV" o "TV", filtra metric_type = 'Free TV'
@@ -393,10 +462,9 @@ def generate_sql_query(prompt, schema, api_key=None):
             - "Free TV Italia 2024?" -> SELECT CAST(a.year AS TEXT) as year, r.name as region, a.metric_type, a.value FROM advertising_data a JOIN regions r ON a.region_id = r.id WHERE r.name = 'Italy' AND a.year = 2024 AND a.metric_type = 'Free TV';
             - "Digital spend in France 2023" -> SELECT CAST(a.year AS TEXT) as year, r.name as region, a.metric_type, a.value FROM advertising_data a JOIN regions r ON a.region_id = r.id WHERE r.name = 'France' AND a.year = 2023 AND a.metric_type LIKE 'Digital%';
             """
-        
-        # Istruzioni per query su dati pubblicitari globali
-        if is_about_global_advertising(prompt):
-            specific_instructions += """
+
+# Istruzioni per query su dati pubblicitari globali
+_INSTR_GLOBAL_AD = """
             Per query sui dati pubblicitari per tutti i paesi o globali:
             - Usa la tabella advertising_data e regions per ottenere dati per tutti i paesi
             - Assicurati di usare JOIN tra advertising_data e regions per ottenere il nome del paese
@@ -437,10 +505,9 @@ def generate_sql_query(prompt, schema, api_key=None):
                   a.metric_type LIKE 'Display%')
               ORDER BY r.name;
             """
-        
-        # Istruzioni per query sui dati specifici di advertising revenue 2024
-        if is_about_ad_revenue_2024(prompt):
-            specific_instructions += """
+
+# Istruzioni per query sui dati specifici di advertising revenue 2024
+_INSTR_AD_REV_2024 = """
             Per query specifiche sui dati di advertising revenue 2024:
             - Usa la tabella advertising_revenue_2024 che contiene i dati aggiornati di ricavi pubblicitari 2024
             - La tabella ha la struttura (id, company, year, revenue, comments)
@@ -464,10 +531,9 @@ def generate_sql_query(prompt, schema, api_key=None):
               WHERE year = 2024
               ORDER BY revenue DESC;
             """
-            
-        # Istruzioni per query su metriche aziendali
-        if is_about_company_metrics(prompt):
-            specific_instructions += """
+
+# Istruzioni per query su metriche aziendali
+_INSTR_METRICS = """
             Per query su metriche finanziarie aziendali:
             - Usa SEMPRE la tabella company_metrics con il filtro metric_name appropriato
             - Non usare MAI la tabella advertising_revenue per queries su revenue generali
@@ -491,10 +557,9 @@ def generate_sql_query(prompt, schema, api_key=None):
               ORDER BY year DESC
               LIMIT 3;
             """
-            
-        # Istruzioni per query su insights aziendali
-        if is_about_insights(prompt):
-            specific_instructions += """
+
+# Istruzioni per query su insights aziendali
+_INSTR_INSIGHTS = """
             Per query su insights, segmenti o iniziative aziendali:
             - Usa la tabella company_insights per insights generali su un'azienda
             - Usa la tabella segment_insights per insights specifici sui segmenti di un'azienda
@@ -518,9 +583,45 @@ def generate_sql_query(prompt, schema, api_key=None):
               FROM company_insights 
               WHERE company = 'Meta' AND year = 2024;
             """
-        
-        # Definisci il sistema di istruzioni
-        system_instruction = f"""
+
+_INSTR_SNIPPETS = (
+    _INSTR_COUNTRY_AD,
+    _INSTR_GLOBAL_AD,
+    _INSTR_AD_REV_2024,
+    _INSTR_METRICS,
+    _INSTR_INSIGHTS,
+)
+
+
+@lru_cache(maxsize=32)
+def _build_specific_instructions(flags):
+    """
+    Compone le indicazioni specifiche per una combinazione di categorie.
+
+    Args:
+        flags (tuple): (paese e pubblicità, pubblicità globale, advertising revenue 2024,
+            metriche aziendali, insights), nello stesso ordine di _INSTR_SNIPPETS
+
+    Returns:
+        str: Il blocco di istruzioni da inserire nel prompt di sistema
+    """
+    return _INSTR_BASE + "".join(
+        snippet for enabled, snippet in zip(flags, _INSTR_SNIPPETS) if enabled
+    )
+
+def _build_system_instruction(schema, flags):
+    """
+    Compone il prompt di sistema completo per uno schema e una combinazione di categorie.
+
+    Args:
+        schema (str): Lo schema del database in formato stringa
+        flags (tuple): Le categorie attive, come per _build_specific_instructions
+
+    Returns:
+        str: Il prompt di sistema da inviare al modello
+    """
+    specific_instructions = _build_specific_instructions(flags)
+    return f"""
         You are an expert SQL assistant that helps translate natural language questions into SQL queries.
         You understand and can process questions in English, Italian, and Spanish.
         Use the provided database schema to generate valid and optimized SQL queries.
@@ -553,45 +654,268 @@ def generate_sql_query(prompt, schema, api_key=None):
             which contains the most up-to-date information about company advertising revenues in 2024
         {specific_instructions}
         """
+
+@lru_cache(maxsize=256)
+def _build_system_message(schema, flags):
+    """
+    Messaggio di sistema ({"role": "system", ...}) per uno schema e una combinazione di categorie.
+
+    Lo schema è di norma lo stesso per tutta la sessione, quindi il prompt viene
+    formattato una volta sola per ciascuna combinazione di flags e il dizionario
+    riusato da tutte le richieste (l'SDK non lo modifica).
+    """
+    return {"role": "system", "content": _build_system_instruction(schema, flags)}
+
+
+# Cache locale delle SQL generate (prompt, schema) -> SQL, attiva con EARNINGSCALL_SQL_CACHE=1
+_SQL_CACHE = OrderedDict()
+_SQL_CACHE_MAX = 1024
+_SQL_CACHE_LOCK = threading.Lock()
+
+
+def _sql_cache_enabled():
+    """Indica se la cache locale delle SQL generate è attiva."""
+    return os.getenv('EARNINGSCALL_SQL_CACHE') == '1'
+
+
+def _sql_cache_key(prompt, schema):
+    """Chiave della cache: il prompt e un digest compatto dello schema."""
+    return (prompt, hashlib.blake2b(schema.encode(), digest_size=8).digest())
+
+
+def _sql_cache_get(key):
+    """Restituisce la SQL in cache per la chiave (None se assente), aggiornandone l'uso."""
+    with _SQL_CACHE_LOCK:
+        sql_query = _SQL_CACHE.get(key)
+        if sql_query is not None:
+            _SQL_CACHE.move_to_end(key)
+        return sql_query
+
+
+def _sql_cache_put(key, sql_query):
+    """Salva una SQL generata, scartando la meno recente oltre _SQL_CACHE_MAX voci."""
+    with _SQL_CACHE_LOCK:
+        _SQL_CACHE[key] = sql_query
+        _SQL_CACHE.move_to_end(key)
+        if len(_SQL_CACHE) > _SQL_CACHE_MAX:
+            _SQL_CACHE.popitem(last=False)
+
+
+# Risposta fissa per gli scenari Bitcoin, gestiti da un calcolatore dedicato
+_BITCOIN_SCENARIO_SQL = "/* This is a Bitcoin investment scenario query and will be handled by a special calculator */"
+
+# Parametri della richiesta a OpenAI, comuni alla versione sincrona e asincrona.
+# La risposta arriva in streaming e si interrompe alla recinzione di chiusura
+# del blocco SQL ("\n```"): l'eventuale testo successivo non viene generato.
+_COMPLETION_PARAMS = {
+    'model': "gpt-4o-mini",
+    'temperature': 0.3,  # Temperatura bassa per risposte più deterministiche
+    'max_tokens': 400,
+    'stream': True,
+    'stop': ["\n```"],
+}
+
+
+def _chunk_text(chunk):
+    """Testo contenuto in un frammento dello stream (stringa vuota se assente)."""
+    if chunk.choices and chunk.choices[0].delta.content:
+        return chunk.choices[0].delta.content
+    return ""
+
+
+def _coerce_schema(schema):
+    """
+    Restituisce lo schema come stringa JSON.
+
+    Le stringhe passano invariate; dict e liste vengono serializzati in JSON
+    compatto (con orjson se disponibile) invece di finire nel prompt come repr Python.
+    """
+    if isinstance(schema, str):
+        return schema
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(schema).decode()
+    return json.dumps(schema, ensure_ascii=False, separators=(',', ':'))
+
+
+def _prepare_sql_request(prompt, schema):
+    """
+    Passi che precedono la chiamata al modello, comuni a generate_sql_query e
+    generate_sql_query_async.
+
+    Returns:
+        tuple: (sql_query, cache_key, system_message). sql_query è valorizzata
+            solo se la risposta è già disponibile (scenario Bitcoin o cache).
+    """
+    schema = _coerce_schema(schema)
+    
+    # Classifica la query una sola volta e riusa il risultato in tutti i rami
+    prompt_lower = prompt.lower()
+    flags = _classify_all(prompt, prompt_lower)
+    
+    # Check for special query types that shouldn't be converted to SQL
+    if flags.bitcoin:
+        logger.info(f"Query involves Bitcoin investment scenario, bypassing SQL generation")
+        return _BITCOIN_SCENARIO_SQL, None, None
         
-        logger.info(f"Generating SQL for query: {prompt}")
-        if is_about_specific_country(prompt):
-            logger.info(f"Query involves a specific country")
-        if is_about_tv_or_advertising(prompt):
-            logger.info(f"Query involves TV or advertising")
-        if is_about_global_advertising(prompt):
-            logger.info(f"Query involves global advertising data across countries")
-        if is_about_company_metrics(prompt):
-            logger.info(f"Query involves company metrics")
-        if is_about_insights(prompt):
-            logger.info(f"Query involves company insights or segments")
-        if is_about_ad_revenue_2024(prompt):
-            logger.info(f"Query involves 2024 advertising revenue data")
+    # Riusa la SQL già generata per lo stesso prompt e schema, se la cache è attiva
+    cache_key = _sql_cache_key(prompt, schema) if _sql_cache_enabled() else None
+    if cache_key is not None:
+        cached_sql = _sql_cache_get(cache_key)
+        if cached_sql is not None:
+            logger.info(f"Using cached SQL for query: {prompt}")
+            return cached_sql, None, None
+    
+    # Categorie che richiedono indicazioni specifiche nel prompt di sistema
+    instruction_flags = (
+        flags.country and flags.tv_or_advertising,
+        flags.global_advertising,
+        flags.ad_revenue_2024,
+        flags.company_metrics,
+        flags.insights,
+    )
+    
+    # Definisci il sistema di istruzioni (una sola volta per schema e combinazione di categorie)
+    system_message = _build_system_message(schema, instruction_flags)
+    
+    logger.info(f"Generating SQL for query: {prompt}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Query classification: country=%s tv=%s global=%s metrics=%s insights=%s ad2024=%s bitcoin=%s",
+            flags.country, flags.tv_or_advertising, flags.global_advertising,
+            flags.company_metrics, flags.insights, flags.ad_revenue_2024, flags.bitcoin,
+        )
+    
+    return None, cache_key, system_message
+
+
+def _finish_sql_request(content, cache_key):
+    """Pulisce la risposta del modello e la salva in cache se richiesto."""
+    # Rimuovi blocchi di codice markdown se presenti
+    sql_query = _FENCE_RE.match(content.strip()).group(1)
+    logger.info(f"Generated SQL: {sql_query}")
+    
+    if cache_key is not None:
+        _sql_cache_put(cache_key, sql_query)
+    
+    return sql_query
+
+
+# Limiti della richiesta sincrona: niente retry automatici dell'SDK, risposta
+# entro 15 secondi, così un errore arriva subito all'utente invece di bloccare la pagina
+_REQUEST_TIMEOUT = 15
+_REQUEST_MAX_RETRIES = 0
+
+
+@lru_cache(maxsize=4)
+def _sync_client(api_key):
+    """
+    Restituisce il client OpenAI per la chiave API, creato al primo uso.
+
+    Il client resta vivo per tutto il processo con un pool httpx keep-alive, così le
+    richieste successive riusano le connessioni TLS già aperte. HTTP/2 viene usato
+    solo se il pacchetto h2 è installato.
+    """
+    import httpx
+    try:
+        import h2  # noqa: F401
+        http2 = True
+    except ImportError:
+        http2 = False
+
+    http_client = httpx.Client(
+        http2=http2,
+        timeout=_REQUEST_TIMEOUT,
+        limits=httpx.Limits(max_keepalive_connections=20, keepalive_expiry=60),
+    )
+    return _openai().OpenAI(
+        api_key=api_key,
+        http_client=http_client,
+        timeout=_REQUEST_TIMEOUT,
+        max_retries=_REQUEST_MAX_RETRIES,
+    )
+
+
+def generate_sql_query(prompt, schema, api_key=None):
+    """
+    Genera una query SQL a partire da una richiesta in linguaggio naturale
+    utilizzando OpenAI.
+    
+    Args:
+        prompt (str): La richiesta in linguaggio naturale
+        schema (str | dict): Lo schema del database in formato stringa JSON (o già decodificato)
+        api_key (str, optional): La chiave API di OpenAI (opzionale se già in env)
+    
+    Returns:
+        str: La query SQL generata
+    """
+    try:
+        sql_query, cache_key, system_message = _prepare_sql_request(prompt, schema)
+        if sql_query is not None:
+            return sql_query
+        
+        # Client OpenAI persistente per la chiave API
+        client = _sync_client(_resolve_api_key(api_key))
         
         # Prepara e invia la richiesta a OpenAI
-        response = openai.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": system_instruction},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3,  # Temperatura bassa per risposte più deterministiche
-            max_tokens=1000
+        response = client.chat.completions.create(
+            messages=[system_message, {"role": "user", "content": prompt}],
+            **_COMPLETION_PARAMS
         )
         
-        # Estrai la risposta e puliscila
-        sql_query = response.choices[0].message.content.strip()
-        
-        # Rimuovi blocchi di codice markdown se presenti
-        if sql_query.startswith("```sql"):
-            sql_query = sql_query.replace("```sql", "", 1)
-        if sql_query.endswith("```"):
-            sql_query = sql_query[:-3]
+        # Ricomponi la risposta dallo stream e puliscila
+        content = "".join(_chunk_text(chunk) for chunk in response)
+        return _finish_sql_request(content, cache_key)
+    
+    except Exception as e:
+        logger.error(f"Error generating SQL query: {str(e)}")
+        raise Exception(f"Errore nella generazione SQL: {str(e)}")
+
+
+# Client asincroni per event loop: il pool di connessioni httpx è legato al loop che lo usa
+_ASYNC_CLIENTS = weakref.WeakKeyDictionary()
+
+
+def _async_client(api_key):
+    """Restituisce il client AsyncOpenAI del loop corrente, creandolo al primo uso."""
+    import asyncio
+    loop = asyncio.get_running_loop()
+    cached = _ASYNC_CLIENTS.get(loop)
+    if cached is None or cached[0] != api_key:
+        cached = (api_key, _openai().AsyncOpenAI(api_key=api_key))
+        _ASYNC_CLIENTS[loop] = cached
+    return cached[1]
+
+
+async def generate_sql_query_async(prompt, schema, api_key=None):
+    """
+    Versione asincrona di generate_sql_query, per generare più query in parallelo.
+    
+    Le richieste indipendenti si possono lanciare insieme, ad esempio:
+        await asyncio.gather(*(generate_sql_query_async(p, schema) for p in prompts))
+    
+    Args:
+        prompt (str): La richiesta in linguaggio naturale
+        schema (str | dict): Lo schema del database in formato stringa JSON (o già decodificato)
+        api_key (str, optional): La chiave API di OpenAI (opzionale se già in env)
+    
+    Returns:
+        str: La query SQL generata
+    """
+    try:
+        sql_query, cache_key, system_message = _prepare_sql_request(prompt, schema)
+        if sql_query is not None:
+            return sql_query
         
-        sql_query = sql_query.strip()
-        logger.info(f"Generated SQL: {sql_query}")
+        client = _async_client(_resolve_api_key(api_key))
+        response = await client.chat.completions.create(
+            messages=[system_message, {"role": "user", "content": prompt}],
+            **_COMPLETION_PARAMS
+        )
         
-        return sql_query
+        parts = []
+        async for chunk in response:
+            parts.append(_chunk_text(chunk))
+        return _finish_sql_request("".join(parts), cache_key)
     
     except Exception as e:
         logger.error(f"Error generating SQL query: {str(e)}")
@@ -47,10 +47,10 @@ class OptimizedDataLoader:
         top_companies = ["Apple", "Microsoft", "Alphabet", "Amazon", "Meta Platforms"]
         common_years = [2021, 2022, 2023, 2024]
         
-        # Pre-warm the cache
+        # Pre-warm the cache; metrics for every pair come back in one call
+        processor.get_metrics_bulk([(company, year) for company in top_companies for year in common_years])
         for company in top_companies:
             for year in common_years:
-                processor.get_metrics(company, year)
                 processor.get_segments(company, year)
                 
         # Force evaluation of lazy-loaded properties
@@ -81,10 +81,10 @@ def preload_frequently_accessed_data(processor):
     top_companies = ["Apple", "Microsoft", "Alphabet", "Amazon", "Meta Platforms"]
     common_years = [2021, 2022, 2023, 2024]
     
-    # Pre-warm the cache
+    # Pre-warm the cache; metrics for every pair come back in one call
+    processor.get_metrics_bulk([(company, year) for company in top_companies for year in common_years])
     for company in top_companies:
         for year in common_years:
-            processor.get_metrics(company, year)
             processor.get_segments(company, year)
             
     # Force evaluation of lazy-loaded properties
@@ -115,15 +115,18 @@ def load_data_for_year(year, companies, processor_id=None):
     """Load data for a specific year and set of companies."""
     processor = get_data_processor()
     result = {}
-    
+
+    try:
+        bulk = processor.get_metrics_bulk([(company, year) for company in companies])
+    except Exception as e:
+        logger.error(f"Error loading data for {year}: {e}")
+        return result
+
     for company in companies:
-        try:
-            metrics = processor.get_metrics(company, year)
-            if metrics:
-                if year not in result:
-                    result[year] = []
-                result[year].append(metrics)
-        except Exception as e:
-            logger.error(f"Error loading data for {company}, {year}: {e}")
-            
+        metrics = bulk.get((company, year))
+        if metrics:
+            if year not in result:
+                result[year] = []
+            result[year].append(metrics)
+
     return result
\ No newline at end of file
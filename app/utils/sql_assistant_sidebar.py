@@ -4,12 +4,17 @@ to any page's sidebar.
 """
 import streamlit as st
 import pandas as pd
+import numpy as np
 import os
 import json
 import sys
-from utils.database_service import get_schema_as_string, execute_query
+import re
+import hashlib
+import threading
+import time
+from collections import deque
 from utils.language import get_translation
-from utils.api_key_manager import check_api_key
+from utils.api_key_manager import check_api_key, load_api_key
 from utils.user_role import get_user_role, get_role_based_insight
 import random
 import logging
@@ -18,31 +23,205 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Sample queries in multiple languages
+# Sample queries in multiple languages (immutable tuples, built once at import)
 SAMPLE_QUERIES = {
-    'en': [
+    'en': (
         "Show me all companies with revenue greater than 50 billion in 2023",
         "What are the top 5 companies by market capitalization in 2024?",
         "Compare the segment distribution for Apple between 2022 and 2023",
         "List all countries with their total ad spend values in 2022, sorted by highest spend",
         "What if tech companies had invested their cash in Bitcoin in 2017?"
-    ],
-    'it': [
+    ),
+    'it': (
         "Mostrami tutte le aziende con un fatturato superiore a 50 miliardi nel 2023",
         "Quali sono le 5 principali aziende per capitalizzazione di mercato nel 2024?",
         "Confronta la distribuzione dei segmenti di Apple tra il 2022 e il 2023",
         "Elenca tutti i paesi con i loro valori di spesa pubblicitaria totale nel 2022, ordinati per spesa più alta",
         "E se le aziende tecnologiche avessero investito la loro liquidità in Bitcoin nel 2017?"
-    ],
-    'es': [
+    ),
+    'es': (
         "Muéstrame todas las empresas con ingresos superiores a 50 mil millones en 2023",
         "¿Cuáles son las 5 principales empresas por capitalización de mercado en 2024?",
         "Compara la distribución de segmentos de Apple entre 2022 y 2023",
         "Lista todos los países con sus valores de gasto publicitario total en 2022, ordenados por mayor gasto",
         "¿Qué pasaría si las empresas tecnológicas hubieran invertido su efectivo en Bitcoin en 2017?"
-    ]
+    )
+}
+
+# Simple greetings or conversational phrases answered without generating SQL
+_GREETINGS = frozenset({
+    'hello', 'hi', 'hey', 'ciao', 'hola', 'salut', 'buongiorno', 'buenos dias',
+    'good morning', 'good afternoon', 'good evening'
+})
+
+# Reply to a greeting, by interface language (English is the default)
+_GREETING_RESPONSES = {
+    'en': "Hello! I'm your SQL Assistant. How can I help you today? You can ask me about company financial data, business segments, or global advertising data.",
+    'it': "Ciao! Sono il tuo assistente SQL. Come posso aiutarti oggi? Puoi chiedermi informazioni sui dati finanziari delle aziende, segmenti di business, o dati pubblicitari globali.",
+    'es': "¡Hola! Soy tu asistente SQL. ¿Cómo puedo ayudarte hoy? Puedes preguntarme sobre datos financieros de empresas, segmentos de negocio o datos publicitarios globales."
+}
+
+# Keywords that mark an insight question needing a text response (substring match)
+_INSIGHT_KEYWORDS = (
+    'explain', 'why', 'how', 'insight', 'analysis',
+    'trend', 'describe', 'summary', 'forecast', 'predict',
+    'compare', 'segment', 'growth', 'performance', 'market',
+    'seasonal', 'metrics', 'kpi', 'roi', 'profitability'
+)
+_INSIGHT_RE = re.compile("|".join(map(re.escape, _INSIGHT_KEYWORDS)))
+
+# Start year for Bitcoin scenarios (2015-2024)
+_BTC_YEAR_RE = re.compile(r'\b(201[5-9]|202[0-4])\b')
+
+# Initial session state for the sidebar SQL assistant
+_DEFAULTS = {
+    "sidebar_sql_query": "",
+    "sidebar_generated_sql": "",
+    "sidebar_query_results": None,
+    "sidebar_show_results": False,
 }
 
+@st.cache_data(ttl=600, show_spinner=False)
+def _cached_schema_string():
+    """
+    Database schema for the SQL prompt, shared across reruns and sessions for 10 minutes
+    """
+    # Import here so the sidebar can load without the database driver
+    from utils.database_service import get_schema_as_string
+    
+    schema_str = get_schema_as_string()
+    if schema_str.startswith("Error getting schema"):
+        # Raise instead of returning so a transient DB error is not cached
+        raise RuntimeError(schema_str)
+    return schema_str
+
+def _digest(text):
+    """
+    Short, stable digest used as a cache key in place of large or secret strings
+    """
+    return hashlib.blake2s(text.encode()).hexdigest()
+
+# Requests per minute this server process sends to the SQL generation model
+_LLM_RPM = 60
+
+@st.cache_resource(show_spinner=False)
+def _llm_limiter():
+    """
+    Process-wide sliding window of recent SQL generation requests, shared by all sessions
+    """
+    return {"times": deque(), "lock": threading.Lock(), "rpm": _LLM_RPM}
+
+def _acquire(limiter):
+    """
+    Wait until the last minute has a free request slot, then take it
+    """
+    while True:
+        with limiter["lock"]:
+            now = time.monotonic()
+            times = limiter["times"]
+            while times and now - times[0] >= 60:
+                times.popleft()
+            if len(times) < limiter["rpm"]:
+                times.append(now)
+                return
+            wait = 60 - (now - times[0])
+        time.sleep(wait)
+
+def _normalize_question(text):
+    """
+    Canonical form of a question for the SQL cache: collapsed whitespace, no trailing punctuation
+    """
+    return " ".join(text.split()).rstrip("?.! ")
+
+@st.cache_data(persist="disk", max_entries=2000, show_spinner=False)
+def _cached_generate_sql(nl_query, schema_hash, api_key_hash, _schema_str, _api_key):
+    """
+    Generate SQL for a natural-language query, reusing the answer for repeated questions.
+    
+    The cache key is (query, schema digest, API key digest); the schema text and the
+    key itself are passed as underscore arguments so Streamlit does not hash them.
+    Entries are persisted to disk and survive server restarts; a schema change
+    produces a new digest, so stale SQL is never reused for a different schema.
+    """
+    # Import function here to avoid errors if the API key is not configured
+    from utils.openai_service import generate_sql_query
+    
+    # Only cache misses reach the model: pace them below the rate limit instead of hitting 429s
+    _acquire(_llm_limiter())
+    return generate_sql_query(nl_query, _schema_str, _api_key)
+
+@st.cache_data(ttl=300, max_entries=256, show_spinner=False)
+def _cached_execute_query(sql):
+    """
+    Run a generated query, reusing its result for 5 minutes across reruns
+    """
+    from utils.database_service import execute_query
+    
+    return execute_query(sql)
+
+@st.cache_resource(show_spinner=False)
+def _http_session():
+    """
+    Shared requests.Session with a keep-alive connection pool for local API calls
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(
+        pool_connections=8,
+        pool_maxsize=8,
+        max_retries=Retry(total=3, backoff_factor=0.3)
+    ))
+    return session
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _fetch_btc_scenario(start_year):
+    """
+    Fetch the Bitcoin investment scenario for a start year from the local API.
+    
+    The endpoint is deterministic per start year, so the parsed JSON is cached
+    for an hour; non-200 responses raise requests.HTTPError and are not cached.
+    """
+    # Make request to API endpoint with simplified response format
+    response = _http_session().get(
+        f"http://127.0.0.1:5050/bitcoin_investment_scenario?start_year={start_year}&format=simplified",
+        timeout=10
+    )
+    response.raise_for_status()
+    return response.json()
+
+# Largest table sent to the browser as is; bigger results show head and tail only
+# (the CSV download always contains every row)
+_PREVIEW_ROWS = 1000
+
+def _preview(df):
+    """
+    Rows of a result table to display: the whole table if small, else its head and tail
+    """
+    if len(df) <= _PREVIEW_ROWS:
+        return df
+    half = _PREVIEW_ROWS // 2
+    return pd.concat([df.head(half), df.tail(half)])
+
+def _format_amount(value):
+    """
+    Format a dollar amount for the insight summary, in billions or millions when large
+    """
+    if value > 1000000000:
+        return f"${value/1000000000:.1f} billion"
+    if value > 1000000:
+        return f"${value/1000000:.1f} million"
+    return f"${value:,.2f}"
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _df_to_csv(df):
+    """
+    CSV export of a results DataFrame, cached on its content so reruns do not re-serialize it
+    """
+    return df.to_csv(index=False)
+
 def render_sql_assistant_sidebar():
     """
     Render the SQL Assistant in the sidebar of any page
@@ -71,14 +250,8 @@ def render_sql_assistant_sidebar():
         return
     
     # Initialize session state for sidebar SQL assistant
-    if "sidebar_sql_query" not in st.session_state:
-        st.session_state.sidebar_sql_query = ""
-    if "sidebar_generated_sql" not in st.session_state:
-        st.session_state.sidebar_generated_sql = ""
-    if "sidebar_query_results" not in st.session_state:
-        st.session_state.sidebar_query_results = None
-    if "sidebar_show_results" not in st.session_state:
-        st.session_state.sidebar_show_results = False
+    for key, value in _DEFAULTS.items():
+        st.session_state.setdefault(key, value)
         
     # Text area for query input
     st.sidebar.markdown(f"##### {ask_natural_language}")
@@ -102,26 +275,21 @@ def render_sql_assistant_sidebar():
     
     # Define callback functions to avoid page reloads
     def generate_and_execute_sql():
+        # Read and normalize the query once for all the checks below
+        q = st.session_state.sidebar_sql_query
+        q_lower = q.lower().strip()
+        
         # Check if query is empty
-        if not st.session_state.sidebar_sql_query.strip():
+        if not q_lower:
             st.session_state.sidebar_sql_error = "Please enter a query."
             return
         
         # Check if the input is a simple greeting or conversational phrase
-        input_lower = st.session_state.sidebar_sql_query.lower().strip()
-        greetings = ['hello', 'hi', 'hey', 'ciao', 'hola', 'salut', 'buongiorno', 'buenos dias', 
-                     'good morning', 'good afternoon', 'good evening']
-        
-        if any(input_lower == greeting for greeting in greetings):
+        if q_lower in _GREETINGS:
             # Handle as a greeting rather than a query
             lang = st.session_state.language if "language" in st.session_state else "en"
             
-            if lang == "it":
-                greeting_response = f"Ciao! Sono il tuo assistente SQL. Come posso aiutarti oggi? Puoi chiedermi informazioni sui dati finanziari delle aziende, segmenti di business, o dati pubblicitari globali."
-            elif lang == "es":
-                greeting_response = f"¡Hola! Soy tu asistente SQL. ¿Cómo puedo ayudarte hoy? Puedes preguntarme sobre datos financieros de empresas, segmentos de negocio o datos publicitarios globales."
-            else:  # Default to English
-                greeting_response = f"Hello! I'm your SQL Assistant. How can I help you today? You can ask me about company financial data, business segments, or global advertising data."
+            greeting_response = _GREETING_RESPONSES.get(lang, _GREETING_RESPONSES["en"])
             
             # Clear any previous results and errors
             st.session_state.sidebar_sql_error = None
@@ -141,83 +309,79 @@ def render_sql_assistant_sidebar():
         st.session_state.sidebar_sql_error = None
         
         try:
-            # Import function here to avoid errors if the API key is not configured
-            from utils.openai_service import generate_sql_query
-            
             # Get API key
             api_key = load_api_key()
             
-            # Get database schema
-            schema_str = get_schema_as_string()
+            # Get database schema (cached, not re-read from the DB on every click)
+            schema_str = _cached_schema_string()
             
-            # 1. Generate SQL query (store in session but don't show to users)
-            sql = generate_sql_query(st.session_state.sidebar_sql_query, schema_str, api_key)
+            # 1. Generate SQL query (store in session but don't show to users);
+            #    questions differing only in spacing or final punctuation share a cache entry
+            sql = _cached_generate_sql(
+                _normalize_question(q),
+                _digest(schema_str),
+                _digest(api_key or ""),
+                schema_str,
+                api_key
+            )
             st.session_state.sidebar_generated_sql = sql
             # Don't display the SQL to users as it's a technical implementation detail
             
             # 2. Check if this is an insight question that needs text response
-            is_insight_question = any(keyword in st.session_state.sidebar_sql_query.lower() 
-                                       for keyword in ['explain', 'why', 'how', 'insight', 'analysis', 
-                                                      'trend', 'describe', 'summary', 'forecast', 'predict',
-                                                      'compare', 'segment', 'growth', 'performance', 'market',
-                                                      'seasonal', 'metrics', 'kpi', 'roi', 'profitability'])
+            is_insight_question = _INSIGHT_RE.search(q_lower) is not None
             
             # 3. Special handling for Bitcoin investment scenario queries
             from utils.openai_service import is_bitcoin_scenario_query
             
-            if is_bitcoin_scenario_query(st.session_state.sidebar_sql_query):
+            if is_bitcoin_scenario_query(q, _q_lower=q_lower):
+                import requests
+                
                 try:
-                    # Use a special API endpoint for Bitcoin scenarios
-                    import requests
-                    
                     # Extract start year from query if present, otherwise use default (2015)
-                    import re
-                    year_match = re.search(r'\b(201[5-9]|202[0-4])\b', st.session_state.sidebar_sql_query)
+                    year_match = _BTC_YEAR_RE.search(q)
                     start_year = int(year_match.group(0)) if year_match else 2015
                     
-                    # Make request to API endpoint with simplified response format
-                    response = requests.get(
-                        f"http://127.0.0.1:5050/bitcoin_investment_scenario?start_year={start_year}&format=simplified",
-                        timeout=10
-                    )
+                    # Use a special API endpoint for Bitcoin scenarios (cached per start year)
+                    bitcoin_data = _fetch_btc_scenario(start_year)
                     
-                    if response.status_code == 200:
-                        # Process the results
-                        bitcoin_data = response.json()
-                        
-                        # Create a human-readable response with improved formatting
-                        markdown_response = f"""
-                        ### Bitcoin Investment Scenario (Starting {start_year})
-                        
-                        What if tech companies had invested their cash reserves in Bitcoin?
-                        
-                        | Company | Cash Balance {start_year} | Worth in 2024 | Gain/Loss |
-                        |---------|----------------------|--------------|-----------|
-                        """
-                        
-                        for company, data in bitcoin_data.items():
-                            if data['original_cash'] and data['btc_value']:
-                                # Format numbers with proper spacing
-                                original = f"${data['original_cash']/1000:.1f} B"
-                                current = f"${data['btc_value']/1000:.1f} B"
-                                pct = data['percent_change']
-                                change = f"{pct:+,.0f}%"
-                                markdown_response += f"| {company} | {original} | {current} | {change} |\n"
-                        
-                        # Store special result format
-                        st.session_state.sidebar_query_results = {
-                            "rows": [],
-                            "special_response": markdown_response
-                        }
-                        st.session_state.sidebar_show_results = True
-                        st.session_state.sidebar_is_special_query = True
-                        
-                        # Also show in main area
-                        st.markdown(markdown_response)
-                        return
-                    else:
-                        st.session_state.sidebar_sql_error = f"Error processing Bitcoin scenario: {response.text}"
-                        return
+                    # Create a human-readable response with improved formatting
+                    markdown_response = f"""
+                    ### Bitcoin Investment Scenario (Starting {start_year})
+                    
+                    What if tech companies had invested their cash reserves in Bitcoin?
+                    
+                    | Company | Cash Balance {start_year} | Worth in 2024 | Gain/Loss |
+                    |---------|----------------------|--------------|-----------|
+                    """
+                    
+                    # One row per company with both values, formatted column by column
+                    btc_df = pd.DataFrame.from_dict(bitcoin_data, orient="index")
+                    if not btc_df.empty:
+                        btc_df = btc_df[
+                            btc_df["original_cash"].fillna(0).astype(bool) & btc_df["btc_value"].fillna(0).astype(bool)
+                        ]
+                        # Format numbers with proper spacing
+                        markdown_response += "".join(
+                            "| " + btc_df.index.to_series().astype(str)
+                            + " | " + (btc_df["original_cash"] / 1000).map("${:.1f} B".format)
+                            + " | " + (btc_df["btc_value"] / 1000).map("${:.1f} B".format)
+                            + " | " + btc_df["percent_change"].map("{:+,.0f}%".format) + " |\n"
+                        )
+                    
+                    # Store special result format
+                    st.session_state.sidebar_query_results = {
+                        "rows": [],
+                        "special_response": markdown_response
+                    }
+                    st.session_state.sidebar_show_results = True
+                    st.session_state.sidebar_is_special_query = True
+                    
+                    # Also show in main area
+                    st.markdown(markdown_response)
+                    return
+                except requests.HTTPError as e:
+                    st.session_state.sidebar_sql_error = f"Error processing Bitcoin scenario: {e.response.text}"
+                    return
                 except Exception as e:
                     st.session_state.sidebar_sql_error = f"Error processing Bitcoin scenario: {str(e)}"
                     return
@@ -225,7 +389,7 @@ def render_sql_assistant_sidebar():
             # Regular SQL execution for non-Bitcoin queries
             try:
                 # Execute the query without showing technical SQL to end users
-                results = execute_query(sql)
+                results = _cached_execute_query(sql)
                 
                 # Store the results in session state
                 st.session_state.sidebar_query_results = results
@@ -257,8 +421,7 @@ def render_sql_assistant_sidebar():
     def use_sample():
         # Select a random sample query based on language
         lang = st.session_state.language if "language" in st.session_state else "en"
-        sample_queries = SAMPLE_QUERIES.get(lang, SAMPLE_QUERIES["en"])
-        random_query = random.choice(sample_queries)
+        random_query = random.choice(SAMPLE_QUERIES.get(lang, SAMPLE_QUERIES["en"]))
         
         # Set the query text - use a different mechanism to avoid the warning
         # about both default value and session state setting
@@ -338,16 +501,16 @@ def render_sql_assistant_sidebar():
             # Check if we have the query index column (used for multiple statements)
             if has_multiple_results and "_query_index" in df.columns:
                 # We have multiple result sets from different queries
-                # Group results by query index
-                query_groups = df.groupby("_query_index")
+                # Remove the query index column once, then split by query index
+                qi = df["_query_index"].to_numpy()
+                results_df = df.drop(columns=["_query_index"])
                 
                 summary_parts = []
                 all_dfs = []
                 
                 # Process each query result set separately
-                for query_idx, group_df in query_groups:
-                    # Remove the query index column for display
-                    display_df = group_df.drop(columns=["_query_index"])
+                for query_idx in np.unique(qi):
+                    display_df = results_df.iloc[qi == query_idx]
                     all_dfs.append(display_df)
                     
                     # Generate a summary for this result set
@@ -366,7 +529,15 @@ def render_sql_assistant_sidebar():
                         st.sidebar.markdown(f"##### {result_type}")
                         
                         # Display the results for this group
-                        st.sidebar.dataframe(display_df, use_container_width=True, height=150)
+                        st.sidebar.dataframe(_preview(display_df), use_container_width=True, height=150)
+                
+                # Combine the result sets once; reused for display, insights and CSV
+                if len(all_dfs) > 1:
+                    combined_df = pd.concat(all_dfs)
+                elif all_dfs:
+                    combined_df = all_dfs[0]
+                else:
+                    combined_df = results_df
                 
                 # Generate consolidated insights using all data frames
                 if is_insight_question:
@@ -376,14 +547,12 @@ def render_sql_assistant_sidebar():
                         
                         # Always display at least one result, regardless of user role
                         if all_dfs and len(all_dfs) > 0:
-                            consolidated_df = pd.concat(all_dfs) if len(all_dfs) > 1 else all_dfs[0]
-                            st.dataframe(consolidated_df)
+                            st.dataframe(combined_df)
                             
                         # If user has a role, show role-specific insights
                         if user_role and all_dfs and len(all_dfs) > 0:
                             # Generate role-specific insights
-                            consolidated_df = pd.concat(all_dfs) if len(all_dfs) > 1 else all_dfs[0]
-                            role_insight = get_role_based_insight(query, consolidated_df, user_role)
+                            role_insight = get_role_based_insight(query, combined_df, user_role)
                             
                             if role_insight:
                                 st.sidebar.markdown("---")
@@ -396,8 +565,7 @@ def render_sql_assistant_sidebar():
                     st.session_state.sidebar_generate_insights = False
                     
                 # Add option to download all results as CSV
-                combined_df = pd.concat(all_dfs) if len(all_dfs) > 1 else all_dfs[0]
-                csv = combined_df.to_csv(index=False)
+                csv = _df_to_csv(combined_df)
                 st.sidebar.download_button(
                     label=download_csv,
                     data=csv,
@@ -417,17 +585,11 @@ def render_sql_assistant_sidebar():
                         if len(df) == 1:
                             # For single result queries
                             summary = f"Based on the data, "
-                            for column, value in df.iloc[0].items():
-                                if isinstance(value, (int, float)):
-                                    if value > 1000000000:
-                                        value_str = f"${value/1000000000:.1f} billion"
-                                    elif value > 1000000:
-                                        value_str = f"${value/1000000:.1f} million"
-                                    else:
-                                        value_str = f"${value:,.2f}"
-                                    summary += f"the {column} is {value_str}. "
-                                else:
-                                    summary += f"the {column} is {value}. "
+                            # Float columns are shown as amounts; ints (years, counts) and the rest as-is
+                            numeric_cols = df.select_dtypes(include='floating').columns
+                            values = pd.Series(df.iloc[:1].to_numpy(dtype=object).astype(str)[0], index=df.columns)
+                            values[numeric_cols] = df[numeric_cols].iloc[0].map(_format_amount)
+                            summary += "".join("the " + values.index.astype(str) + " is " + values + ". ")
                         
                         elif len(df) <= 5:
                             # For small result sets, give detailed info
@@ -448,17 +610,19 @@ def render_sql_assistant_sidebar():
                                 summary += f"• Lowest {primary_metric}: {min_row[primary_metric]:,.2f} ({min_row[main_col]})\n"
                                 summary += f"• Average {primary_metric}: {df[primary_metric].mean():,.2f}\n"
                             
-                            # List all results in a readable format
+                            # List all results in a readable format, building each
+                            # column's text for all rows at once
                             summary += "\nDetails:\n"
-                            for idx, row in df.iterrows():
-                                item_summary = ""
-                                for col in df.columns:
-                                    if isinstance(row[col], (int, float)) and row[col] > 1000000:
-                                        value_str = f"${row[col]/1000000:.1f}M"
-                                    else:
-                                        value_str = str(row[col])
-                                    item_summary += f"{col}: {value_str}, "
-                                summary += f"• {item_summary[:-2]}\n"
+                            details = pd.DataFrame(
+                                df.to_numpy(dtype=object).astype(str), index=df.index, columns=df.columns
+                            )
+                            for col in numeric_cols:
+                                large = df[col] > 1000000
+                                details.loc[large, col] = (df.loc[large, col] / 1000000).map("${:.1f}M".format)
+                            lines = f"{details.columns[0]}: " + details.iloc[:, 0]
+                            for i, col in enumerate(details.columns[1:], start=1):
+                                lines = lines + f", {col}: " + details.iloc[:, i]
+                            summary += "".join("• " + lines + "\n")
                         
                         else:
                             # For larger result sets, provide a statistical summary
@@ -468,21 +632,25 @@ def render_sql_assistant_sidebar():
                             numeric_cols = df.select_dtypes(include=['number']).columns.tolist()
                             
                             if numeric_cols:
-                                for col in numeric_cols[:2]:  # Limit to first 2 numeric columns
+                                # Limit to first 2 numeric columns, all statistics in one pass
+                                stats = df[numeric_cols[:2]].agg(['mean', 'max', 'min'])
+                                for col in stats.columns:
                                     summary += f"• {col}:\n"
-                                    summary += f"  - Average: {df[col].mean():,.2f}\n"
-                                    summary += f"  - Maximum: {df[col].max():,.2f}\n"
-                                    summary += f"  - Minimum: {df[col].min():,.2f}\n\n"
+                                    summary += f"  - Average: {stats.at['mean', col]:,.2f}\n"
+                                    summary += f"  - Maximum: {stats.at['max', col]:,.2f}\n"
+                                    summary += f"  - Minimum: {stats.at['min', col]:,.2f}\n\n"
                             
                             # Add information about top results
                             if len(df) > 3 and numeric_cols:
                                 primary_metric = numeric_cols[0]
-                                sorted_df = df.sort_values(by=primary_metric, ascending=False)
+                                top_df = df.nlargest(3, primary_metric)
                                 main_col = df.columns[0] if primary_metric != df.columns[0] else df.columns[1]
                                 
                                 summary += "Top 3 results:\n"
-                                for idx, row in sorted_df.head(3).iterrows():
-                                    summary += f"• {row[main_col]}: {row[primary_metric]:,.2f}\n"
+                                summary += "".join(
+                                    "• " + top_df[main_col].astype(str) + ": "
+                                    + top_df[primary_metric].map("{:,.2f}".format) + "\n"
+                                )
                         
                         # Get the user's role and generate role-based insights
                         user_role = get_user_role()
@@ -514,10 +682,15 @@ def render_sql_assistant_sidebar():
                     st.session_state.sidebar_generate_insights = False
                 
                 # Always display the raw data table as well
-                st.sidebar.dataframe(df, use_container_width=True, height=200)
+                st.sidebar.dataframe(_preview(df), use_container_width=True, height=200)
+                if len(df) > _PREVIEW_ROWS:
+                    st.sidebar.caption(
+                        f"Showing the first and last {_PREVIEW_ROWS // 2} of {len(df):,} rows. "
+                        f"Download the CSV for all results."
+                    )
                 
                 # Add option to download results as CSV
-                csv = df.to_csv(index=False)
+                csv = _df_to_csv(df)
                 st.sidebar.download_button(
                     label=download_csv,
                     data=csv,
@@ -2,17 +2,17 @@
 This module contains all the custom CSS styles for the application.
 These styles can be loaded by any page to ensure consistent styling.
 """
+import re
+
 import streamlit as st
-import textwrap
-import plotly.graph_objects as go
-import plotly.io as pio
 
 PLOTLY_TEMPLATE_NAME = "mfe_blue"
+_PLOTLY_FONT_FAMILY = '"Poppins", system-ui, -apple-system, Segoe UI, Roboto, Helvetica, Arial, sans-serif'
 PLOTLY_HOVERLABEL_STYLE = dict(
     bgcolor="rgba(255, 255, 255, 0.98)",
     bordercolor="rgba(0, 115, 255, 0.35)",
     font=dict(
-        family='"Poppins", system-ui, -apple-system, Segoe UI, Roboto, Helvetica, Arial, sans-serif',
+        family=_PLOTLY_FONT_FAMILY,
         size=12,
         color="#0f172a",
     ),
@@ -21,29 +21,49 @@ PLOTLY_HOVERLABEL_STYLE = dict(
 )
 
 def apply_plotly_theme():
+    """
+    Register the app's Plotly template and make it the default.
+    Pages that draw Plotly charts call this before building figures;
+    plotly is only imported here so other pages don't pay for it.
+    """
+    import plotly.graph_objects as go
+    import plotly.io as pio
+    
+    # Pages call this on every rerun; build and register the template only once per process
+    if PLOTLY_TEMPLATE_NAME in pio.templates and pio.templates.default == PLOTLY_TEMPLATE_NAME:
+        return
     if "plotly_white" in pio.templates:
-        base_template = go.layout.Template(pio.templates["plotly_white"])
+        # plotly_white is already validated, so copy it without re-running the validators
+        base_template = go.layout.Template(pio.templates["plotly_white"], _validate=False)
     else:
         base_template = go.layout.Template()
     base_template.layout.update(
         hoverlabel=PLOTLY_HOVERLABEL_STYLE,
-        font=dict(
-            family='"Poppins", system-ui, -apple-system, Segoe UI, Roboto, Helvetica, Arial, sans-serif'
-        ),
+        font=dict(family=_PLOTLY_FONT_FAMILY),
     )
     pio.templates[PLOTLY_TEMPLATE_NAME] = base_template
     pio.templates.default = PLOTLY_TEMPLATE_NAME
 
-apply_plotly_theme()
-
-def load_common_styles():
+def _minify_css(html):
     """
-    Load common CSS styles for the application.
-    This should be called at the top of each page.
+    Strip comments and collapse whitespace in an inline <style> block.
     """
-    st.markdown(textwrap.dedent("""
+    return re.sub(r"(?:/\*.*?\*/|\s)+", " ", html, flags=re.S).strip()
+
+# Poppins is loaded through <link> tags rather than an @import inside the style block,
+# so the font CSS is fetched in parallel instead of after the style block is parsed.
+# One tag per line keeps the whole snippet a raw HTML block for the markdown renderer.
+_FONT_LINKS_HTML = "\n".join((
+    '<link rel="preconnect" href="https://fonts.googleapis.com">',
+    '<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>',
+    '<link rel="stylesheet" href="https://fonts.googleapis.com/css2?family=Poppins:wght@500;600;700;800&display=swap">',
+))
+
+# Style blocks are minified once at import; the functions below only emit them.
+# Call them on every run, not once per session: Streamlit removes elements that a
+# run does not re-emit, and unchanged elements are diffed away client-side.
+_COMMON_STYLES_HTML = _FONT_LINKS_HTML + "\n" + _minify_css("""
     <style>
-        @import url('https://fonts.googleapis.com/css2?family=Poppins:wght@500;600;700;800&display=swap');
 	    :root {
 	        --app-font: system-ui, -apple-system, "Segoe UI", Roboto, Helvetica, Arial, sans-serif;
             --chart-font: "Poppins", var(--app-font);
@@ -351,13 +371,16 @@ def load_common_styles():
         }
     }
     </style>
-    """), unsafe_allow_html=True)
+    """)
 
-def load_genie_specific_styles():
+def load_common_styles():
     """
-    Load styles specific to the Genie page.
+    Load common CSS styles for the application.
+    This should be called at the top of each page.
     """
-    st.markdown(textwrap.dedent("""
+    st.markdown(_COMMON_STYLES_HTML, unsafe_allow_html=True)
+
+_GENIE_STYLES_HTML = _minify_css("""
     <style>
     /* Metrics and Segments Visualization Styles */
     .metrics-segments-legend {
@@ -499,13 +522,15 @@ def load_genie_specific_styles():
         }
     }
     </style>
-    """), unsafe_allow_html=True)
+    """)
 
-def load_earnings_specific_styles():
+def load_genie_specific_styles():
     """
-    Load styles specific to the Earnings page.
+    Load styles specific to the Genie page.
     """
-    st.markdown(textwrap.dedent("""
+    st.markdown(_GENIE_STYLES_HTML, unsafe_allow_html=True)
+
+_EARNINGS_STYLES_HTML = _minify_css("""
     <style>
     /* Company Selector Styles */
     .company-selector {
@@ -599,13 +624,15 @@ def load_earnings_specific_styles():
         color: #374151;
     }
     </style>
-    """), unsafe_allow_html=True)
+    """)
 
-def load_overview_specific_styles():
+def load_earnings_specific_styles():
     """
-    Load styles specific to the Overview page.
+    Load styles specific to the Earnings page.
     """
-    st.markdown(textwrap.dedent("""
+    st.markdown(_EARNINGS_STYLES_HTML, unsafe_allow_html=True)
+
+_OVERVIEW_STYLES_HTML = _minify_css("""
     <style>
     /* Bar chart animations */
     .bar-chart-container {
@@ -710,13 +737,15 @@ def load_overview_specific_styles():
         }
     }
     </style>
-    """), unsafe_allow_html=True)
+    """)
 
-def load_global_overview_specific_styles():
+def load_overview_specific_styles():
     """
-    Load styles specific to the Global Overview page.
+    Load styles specific to the Overview page.
     """
-    st.markdown(textwrap.dedent("""
+    st.markdown(_OVERVIEW_STYLES_HTML, unsafe_allow_html=True)
+
+_GLOBAL_OVERVIEW_STYLES_HTML = _minify_css("""
     <style>
     /* Map visualization styles */
     .map-container {
@@ -781,14 +810,15 @@ def load_global_overview_specific_styles():
         color: #262730;
     }
     </style>
-    """), unsafe_allow_html=True)
+    """)
 
-def get_floating_clock_style():
+def load_global_overview_specific_styles():
     """
-    Return the CSS style for the floating clock.
-    Used by time_utils.py for rendering the clock.
+    Load styles specific to the Global Overview page.
     """
-    return textwrap.dedent("""
+    st.markdown(_GLOBAL_OVERVIEW_STYLES_HTML, unsafe_allow_html=True)
+
+_FLOATING_CLOCK_STYLE_HTML = _minify_css("""
     <style>
     .floating-clock {
         position: fixed;
@@ -818,12 +848,14 @@ def get_floating_clock_style():
     </style>
     """)
 
-def get_page_style():
+def get_floating_clock_style():
     """
-    Return the page CSS style.
-    Used by various pages for standard styling.
+    Return the CSS style for the floating clock.
+    Used by time_utils.py for rendering the clock.
     """
-    return textwrap.dedent("""
+    return _FLOATING_CLOCK_STYLE_HTML
+
+_PAGE_STYLE_HTML = _minify_css("""
     <style>
     :root {
         --app-font: system-ui, -apple-system, "Segoe UI", Roboto, Helvetica, Arial, sans-serif;
@@ -964,12 +996,14 @@ def get_page_style():
     </style>
     """)
 
-def get_animation_style():
+def get_page_style():
     """
-    Return the CSS style for animations.
-    Used by pages that need custom animations.
+    Return the page CSS style.
+    Used by various pages for standard styling.
     """
-    return """
+    return _PAGE_STYLE_HTML
+
+_ANIMATION_STYLE_HTML = _minify_css("""
     <style>
     @keyframes fadeIn {
         from {
@@ -1022,4 +1056,11 @@ def get_animation_style():
         animation: pulse 2s infinite;
     }
     </style>
+    """)
+
+def get_animation_style():
+    """
+    Return the CSS style for animations.
+    Used by pages that need custom animations.
     """
+    return _ANIMATION_STYLE_HTML
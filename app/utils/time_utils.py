@@ -2,10 +2,20 @@
 Utility functions for time, date and contextual tense handling
 """
 import datetime
+import string
+import textwrap
+import time
+from functools import lru_cache
+from types import MappingProxyType
+from zoneinfo import ZoneInfo
 import streamlit as st
-import pytz
+
+# Looked up once; ZoneInfo reads the system tz database lazily
+_ROME_TZ = ZoneInfo('Europe/Rome')
 
 # Define a function to get the current date and time
+# The clock only shows minutes, so reruns within 30 seconds reuse the same strings
+@st.cache_data(ttl=30, show_spinner=False)
 def get_current_datetime():
     """
     Get the current date and time formatted for display
@@ -14,7 +24,7 @@ def get_current_datetime():
         Dict with formatted time and date strings
     """
     # Get current time in Italy timezone (UTC+1)
-    current_time = datetime.datetime.now(pytz.timezone('Europe/Rome'))
+    current_time = datetime.datetime.now(_ROME_TZ)
     
     # Format time (hours:minutes only)
     time_str = current_time.strftime("%H:%M")
@@ -31,60 +41,66 @@ def get_current_datetime():
         "year": current_year
     }
 
+# Clock markup, filled in with the current time on each run
+_CLOCK_HTML_TEMPLATE = string.Template(textwrap.dedent("""
+    <div id="floating-clock" class="floating-clock">
+        <div id="clock-time" class="clock-time">${time_str}</div>
+        <div id="clock-date" class="clock-date">${date_str}</div>
+    </div>
+"""))
+
 # Function to render the floating clock
 def render_floating_clock():
     """
     Render a floating clock in the top right corner of the page
     
-    This uses JavaScript to update the time every second
+    The time is rendered from Python on each run: st.markdown does not execute
+    <script> tags, so there is no client-side timer to keep it ticking
     """
     from utils.styles import get_floating_clock_style
     
-    # Get initial values
+    # Get the current Rome time
     current_info = get_current_datetime()
     
-    # Create the HTML for the floating clock
-    clock_html = f"""
-    <div id="floating-clock" class="floating-clock">
-        <div id="clock-time" class="clock-time">{current_info['time_str']}</div>
-        <div id="clock-date" class="clock-date">{current_info['date_str']}</div>
-    </div>
-    
-    <script>
-    // Function to update the clock
-    function updateClock() {{
-        // Create a date object for Italy's timezone (UTC+1)
-        const now = new Date();
-        // Convert to Italy time by adding the time difference
-        const italyNow = new Date(now.getTime() + (1 * 60 * 60 * 1000));
-        
-        // Format time (without seconds)
-        const hours = String(italyNow.getUTCHours()).padStart(2, '0');
-        const minutes = String(italyNow.getUTCMinutes()).padStart(2, '0');
-        const timeStr = `${{hours}}:${{minutes}}`;
-        
-        // Format date - using Italy locale
-        const options = {{ weekday: 'long', year: 'numeric', month: 'long', day: 'numeric', timeZone: 'Europe/Rome' }};
-        const dateStr = now.toLocaleDateString('en-US', options);
-        
-        // Update the elements
-        document.getElementById('clock-time').textContent = timeStr;
-        document.getElementById('clock-date').textContent = dateStr;
-    }}
-    
-    // Update immediately and then every minute (60000ms)
-    updateClock();
-    setInterval(updateClock, 60000);
-    </script>
-    """
-    
-    # Apply the styles and render the clock
-    st.markdown(get_floating_clock_style(), unsafe_allow_html=True)
-    st.markdown(clock_html, unsafe_allow_html=True)
+    # Apply the styles and render the clock in a single element
+    clock_html = _CLOCK_HTML_TEMPLATE.substitute(
+        time_str=current_info['time_str'],
+        date_str=current_info['date_str']
+    )
+    st.markdown(get_floating_clock_style() + clock_html, unsafe_allow_html=True)
     
     # Return the current year for potential use in other functions
     return current_info['year']
 
+# The two possible tense tables, shared read-only by every caller
+_FUTURE_TENSE = MappingProxyType({
+    "is_future": True,
+    "verb_prefix": "is expected to",
+    "verb_suffix": "",
+    "past_verb": "will",
+    "present_verb": "is projected to"
+})
+_PAST_PRESENT_TENSE = MappingProxyType({
+    "is_future": False,
+    "verb_prefix": "",
+    "verb_suffix": "ed",
+    "past_verb": "was",
+    "present_verb": "is"
+})
+
+@lru_cache(maxsize=1)
+def _year_for_hour(hour):
+    """
+    Current year; the hour argument only serves as the cache key
+    """
+    return datetime.datetime.now().year
+
+def _current_year():
+    """
+    Current year, rebuilt at most once an hour so New Year is picked up without a restart
+    """
+    return _year_for_hour(int(time.time() // 3600))
+
 # Function to determine the appropriate verb tense based on year
 def get_contextual_tense(year):
     """
@@ -94,25 +110,6 @@ def get_contextual_tense(year):
         year: The year being referred to in the insight
         
     Returns:
-        Dict with verb forms for different contexts
+        Read-only mapping with verb forms for different contexts
     """
-    current_year = datetime.datetime.now().year
-    
-    if year > current_year:
-        # Future tense
-        return {
-            "is_future": True,
-            "verb_prefix": "is expected to",
-            "verb_suffix": "",
-            "past_verb": "will",
-            "present_verb": "is projected to"
-        }
-    else:
-        # Past or present tense
-        return {
-            "is_future": False,
-            "verb_prefix": "",
-            "verb_suffix": "ed",
-            "past_verb": "was",
-            "present_verb": "is"
-        }
\ No newline at end of file
+    return _FUTURE_TENSE if year > _current_year() else _PAST_PRESENT_TENSE